@@ -0,0 +1,27 @@
+import { API_URL } from '@/lib/constants';
+
+// List endpoints return one page at a time; follow nextCursor until the whole
+// list has been loaded. Resolves to the last page's response with the rows of
+// every page in `data`, or to the first unsuccessful response.
+export async function fetchAll(path: string, init: RequestInit = {}) {
+  const data: any[] = [];
+  let cursor: string | null = null;
+
+  while (true) {
+    const url = new URL(`${API_URL}${path}`);
+    if (cursor) {
+      url.searchParams.set('cursor', cursor);
+    }
+
+    const response = await (await fetch(url.toString(), init)).json();
+    if (!response.success) {
+      return response;
+    }
+
+    data.push(...response.data);
+    cursor = response.nextCursor ?? null;
+    if (!cursor) {
+      return { ...response, data };
+    }
+  }
+}
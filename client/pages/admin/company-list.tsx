@@ -1,5 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import { Button, Input, InputRef, Modal, Space, Table, Tag } from 'antd';
 import type { ColumnsType, TableProps } from 'antd/es/table';
 import type { ColumnType, FilterConfirmProps } from 'antd/es/table/interface';
@@ -219,12 +220,9 @@ const PageContent = () => {
   useEffect(() => {
     const fetchCompanies = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/admins/companies`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/admins/companies', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message);
@@ -1,5 +1,6 @@
 import Layout, { AdminUser } from '@/components/layout/Layout';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import { Modal, Space, Table, TableProps } from 'antd';
 import { ColumnsType } from 'antd/es/table';
 import clsx from 'clsx';
@@ -68,12 +69,9 @@ const PageContent = () => {
   useEffect(() => {
     const fetchStudents = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/admins/students`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/admins/students', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message || 'Something went wrong');
@@ -3,6 +3,7 @@ import clsx from 'clsx';
 import { useEffect, useState } from 'react';
 import toast from 'react-hot-toast';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import type { ColumnsType, TableProps } from 'antd/es/table';
 import { PlusOutlined } from '@ant-design/icons';
 import { Button, Form, Input, Modal, Space, Table } from 'antd';
@@ -334,12 +335,9 @@ const PageContent = () => {
   useEffect(() => {
     const fetchAnnouncements = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/admins/announcements`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/admins/announcements', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message || 'Something went wrong');
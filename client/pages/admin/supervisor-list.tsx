@@ -1,5 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import { Button, Input, InputRef, Modal, Space, Table, Tag } from 'antd';
 import type { ColumnsType, TableProps } from 'antd/es/table';
 import type { ColumnType, FilterConfirmProps } from 'antd/es/table/interface';
@@ -221,12 +222,9 @@ const PageContent = () => {
   useEffect(() => {
     const fetchSupervisors = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/supervisors`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/supervisors', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message);
@@ -4,7 +4,7 @@ import clsx from 'clsx';
 import { useEffect, useState } from 'react';
 import { Announcement } from './admin/manage-announcement';
 import toast from 'react-hot-toast';
-import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 
 export default function AnnouncementPage() {
   const [isLoading, setIsLoading] = useState(true);
@@ -13,12 +13,9 @@ export default function AnnouncementPage() {
   useEffect(() => {
     const fetchAnnouncements = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/admins/announcements`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/admins/announcements', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message || 'Something went wrong');
@@ -2,7 +2,7 @@ import Layout from '@/components/layout/Layout';
 import clsx from 'clsx';
 import toast from 'react-hot-toast';
 import { Job } from './company/manage-jobs';
-import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import { useEffect, useState } from 'react';
 import { Card, Spin, Space } from 'antd';
 
@@ -13,12 +13,9 @@ export default function JobBoard() {
 useEffect(() => {
   const fetchJobs = async () => {
     try {
-      const response = await (
-        await fetch(`${API_URL}/companies/jobboard`, {
-          method: 'GET',
-          credentials: 'include',
-        })
-      ).json();
+      const response = await fetchAll('/companies/jobboard', {
+        credentials: 'include',
+      });
 
       if (!response.success) {
         return toast.error(response.message || 'Something went wrong');
@@ -1,5 +1,6 @@
 import Layout, { StudentUser } from '@/components/layout/Layout';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import {
   Alert,
   Button,
@@ -38,12 +39,9 @@ export default function SubmitInternshipPage() {
   useEffect(() => {
     const fetchCompanies = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/companies`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/companies', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message || 'Something went wrong');
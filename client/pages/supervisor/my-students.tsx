@@ -1,5 +1,6 @@
 import Layout, { SupervisorUser } from '@/components/layout/Layout';
 import { API_URL } from '@/lib/constants';
+import { fetchAll } from '@/lib/fetchAll';
 import { Button, Form, Input, Modal, Result, Select, Spin, Table } from 'antd';
 import type { ColumnsType, TableProps } from 'antd/es/table';
 import clsx from 'clsx';
@@ -74,12 +75,9 @@ const AssignStudentForm = ({
   useEffect(() => {
     const fetchStudents = async () => {
       try {
-        const response = await (
-          await fetch(`${API_URL}/students`, {
-            method: 'GET',
-            credentials: 'include',
-          })
-        ).json();
+        const response = await fetchAll('/students', {
+          credentials: 'include',
+        });
 
         if (!response.success) {
           return toast.error(response.message || 'Something went wrong');
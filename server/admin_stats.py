@@ -0,0 +1,102 @@
+import threading
+import time
+
+import numpy
+from prisma import get_client
+from prisma.models import Company, Internship, Student, Supervisor
+
+from config import stats_cache_ttl
+
+percentiles = [10, 25, 50, 75, 90]
+
+_cached = None
+_lock = threading.Lock()
+
+
+def allowance_stats(allowances):
+    if not allowances:
+        return None
+
+    values = numpy.fromiter(allowances, dtype=float, count=len(allowances))
+    points = numpy.percentile(values, percentiles)
+
+    return {
+        "count": len(allowances),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {
+            "p" + str(p): float(value) for p, value in zip(percentiles, points)
+        },
+    }
+
+
+def compute_stats():
+    status_groups = Internship.prisma().group_by(by=["status"], count=True)
+    company_groups = Internship.prisma().group_by(
+        by=["companyEmail"], count=True, avg={"allowance": True}
+    )
+    companies = {
+        company.email: company.companyName
+        for company in Company.prisma().find_many(
+            where={"email": {"in": [g["companyEmail"] for g in company_groups]}}
+        )
+    }
+
+    client = get_client()
+    months = client.query_raw(
+        "SELECT DATE_FORMAT(createdAt, '%Y-%m') AS month, COUNT(*) AS count "
+        "FROM Internship GROUP BY month ORDER BY month"
+    )
+    # Only the allowance column crosses the wire
+    allowances = [
+        row["allowance"]
+        for row in client.query_raw("SELECT allowance FROM Internship")
+    ]
+
+    return {
+        "students": Student.prisma().count(),
+        "unassignedStudents": Student.prisma().count(
+            where={"supervisorEmail": None}
+        ),
+        "pendingSupervisors": Supervisor.prisma().count(
+            where={"isApproved": False}
+        ),
+        "pendingCompanies": Company.prisma().count(where={"isApproved": False}),
+        "internshipsByStatus": {
+            group["status"]: group["_count"]["_all"] for group in status_groups
+        },
+        "internshipsByCompany": sorted(
+            (
+                {
+                    "companyEmail": group["companyEmail"],
+                    "companyName": companies.get(group["companyEmail"]),
+                    "count": group["_count"]["_all"],
+                    "averageAllowance": group["_avg"]["allowance"],
+                }
+                for group in company_groups
+            ),
+            key=lambda company: company["count"],
+            reverse=True,
+        ),
+        "internshipsByMonth": [
+            {"month": row["month"], "count": int(row["count"])} for row in months
+        ],
+        "allowance": allowance_stats(allowances),
+    }
+
+
+def get_stats():
+    global _cached
+    now = time.monotonic()
+
+    cached = _cached
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    with _lock:
+        if _cached is not None and _cached[1] > now:
+            return _cached[0]
+        stats = compute_stats()
+        _cached = (stats, now + stats_cache_ttl)
+        return stats
@@ -1,13 +1,60 @@
-from flask import Blueprint, current_app, jsonify, make_response, request
+from datetime import datetime, timezone
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    make_response,
+    request,
+)
 from flask_jwt_extended import create_access_token, unset_jwt_cookies
 import jwt
 import prisma
+from prisma import get_client
 from prisma.models import Admin, Student, Internship, Company, Announcement
+from prisma.partials import StudentReportInternship
 
+import admin_stats
+import announcement_feed
+import cache_versions
+import serializers
+import student_export
 from auth_middleware import admin_token_required
+from bulk import BulkRequestError, parse_bulk_list
+from events import event_stream_response, publish, publish_internship_status
+from fields import parse_fields, prune, wants
+from json_stream import stream_list, wants_stream
+from pagination import PaginationError, boolean, equals, iterate, page_query, paginate
+from presigned_url_cache import presigned_url_cache
+from principal_cache import principal_cache
+from response_cache import (
+    announcements_cache,
+    cached_response,
+    jobboard_cache,
+    request_key,
+)
+from student_import import ImportFormatError, StudentImport, read_rows
+from token_claims import principal_claims
 
 admins = Blueprint("admins", __name__)
 
+# Students with a supervisor and a submitted internship. Paged over internships
+# so the keyset is (Internship.createdAt, id).
+student_report = {
+    "sort_fields": ["createdAt", "startDate", "allowance"],
+    "id_field": "id",
+    "where": {"student": {"is": {"supervisorEmail": {"not": None}}}},
+    "include": {"company": True, "student": {"include": {"supervisor": True}}},
+    "filters": {
+        "status": equals("status"),
+        "companyEmail": equals("companyEmail"),
+        "supervisorEmail": lambda value: {
+            "student": {"is": {"supervisorEmail": value}}
+        },
+    },
+}
+
 
 @admins.route("/login", methods=["POST"])
 def adminLogin():
@@ -29,7 +76,10 @@ def adminLogin():
             return {"message": "Invalid email or password", "success": False}
 
         # Create access token
-        access_token = create_access_token(identity=admin.email)
+        access_token = create_access_token(
+            identity=admin.email,
+            additional_claims=principal_claims("admin", admin),
+        )
         response = make_response(
             jsonify(
                 {
@@ -82,9 +132,12 @@ def adminMe():
             {
                 "message": "Authorized admin",
                 "success": True,
-                "data": {
-                    "email": user.email,
-                },
+                "data": prune(
+                    {
+                        "email": user.email,
+                    },
+                    parse_fields(),
+                ),
             }
         )
     except Exception as e:
@@ -121,45 +174,83 @@ def adminLogout():
 @admin_token_required
 def getStudents(user):
     try:
-        students = Student.prisma().find_many(
-            where={"internship": {"isNot": None}, "supervisor": {"isNot": None}},
-            include={"internship": {"include": {"company": True}}, "supervisor": True},
-            order={"internship": {"createdAt": "desc"}},
+        fields = parse_fields()
+        include = {
+            "student": {
+                "include": {"supervisor": True} if wants(fields, "supervisor") else {}
+            },
+        }
+        if wants(fields, "internship.company"):
+            include["company"] = True
+
+        # ?stream=true sends every matching row, fetched page by page while the
+        # response is written
+        if wants_stream():
+            return stream_list(
+                iterate(
+                    StudentReportInternship.prisma(),
+                    **{**student_report, "include": include},
+                ),
+                lambda internship: serializers.student(internship.student, internship),
+                fields,
+                message="Students fetched successfully",
+                success=True,
+            )
+
+        internships, next_cursor = paginate(
+            StudentReportInternship.prisma(), **{**student_report, "include": include}
         )
+
+        student_data = [
+            serializers.student(internship.student, internship)
+            for internship in internships
+        ]
+
         return jsonify(
             {
                 "message": "Students fetched successfully",
                 "success": True,
-                "data": [
-                    {
-                        "studentId": student.studentId,
-                        "fullName": student.fullName,
-                        "email": student.email,
-                        "icNumber": student.icNumber,
-                        "createdAt": student.createdAt.isoformat(),
-                        "supervisor": {
-                            "fullName": student.supervisor.fullName,
-                            "email": student.supervisor.email,
-                        },
-                        "internship": {
-                            "id": student.internship.id,
-                            "status": student.internship.status,
-                            "company": {
-                                "companyName": student.internship.company.companyName,
-                                "email": student.internship.company.email,
-                            },
-                            "startDate": student.internship.startDate.isoformat(),
-                            "endDate": student.internship.endDate.isoformat(),
-                            "allowance": student.internship.allowance,
-                            "createdAt": student.internship.createdAt.isoformat(),
-                            "comSupervisorName": student.internship.comSupervisorName,
-                            "comSupervisorEmail": student.internship.comSupervisorEmail,
-                        },
-                    }
-                    for student in students
-                ],
+                "data": prune(student_data, fields),
+                "nextCursor": next_cursor,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/students/export", methods=["GET"])
+@admin_token_required
+def exportStudents(user):
+    try:
+        format = request.args.get("format", "csv")
+
+        if format == "xlsx" and student_export.openpyxl is None:
+            return (
+                jsonify({"message": "XLSX export is not available", "success": False}),
+                400,
+            )
+        if format not in ("csv", "xlsx"):
+            return jsonify({"message": "Unsupported format", "success": False}), 400
+
+        # Rows are fetched page by page with the keyset cursor while streaming
+        internships = iterate(StudentReportInternship.prisma(), **student_report)
+
+        if format == "xlsx":
+            return Response(
+                student_export.stream_xlsx(internships),
+                mimetype=student_export.xlsx_mimetype,
+                headers={"Content-Disposition": "attachment; filename=students.xlsx"},
+            )
+
+        return Response(
+            student_export.stream_csv(internships),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=students.csv"},
+        )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -178,15 +269,18 @@ def approveInternship(user):
         if internshipId is None:
             return {"message": "Missing required fields", "success": False}
 
-        internship = Internship.prisma().find_unique(where={"id": internshipId})
+        internship = Internship.prisma().find_unique(
+            where={"id": internshipId}, include={"student": True}
+        )
 
         if internship is None:
             return {"message": "Internship not found", "success": False}
 
-        Internship.prisma().update(
+        updated = Internship.prisma().update(
             where={"id": internshipId},
             data={"status": "APPROVED"},
         )
+        publish_internship_status(updated, internship.student)
 
         return jsonify(
             {
@@ -212,15 +306,18 @@ def rejectInternship(user):
         if internshipId is None:
             return {"message": "Missing required fields", "success": False}
 
-        internship = Internship.prisma().find_unique(where={"id": internshipId})
+        internship = Internship.prisma().find_unique(
+            where={"id": internshipId}, include={"student": True}
+        )
 
         if internship is None:
             return {"message": "Internship not found", "success": False}
 
-        Internship.prisma().update(
+        updated = Internship.prisma().update(
             where={"id": internshipId},
             data={"status": "REJECTED"},
         )
+        publish_internship_status(updated, internship.student)
 
         return jsonify(
             {
@@ -232,26 +329,162 @@ def rejectInternship(user):
         return jsonify({"message": str(e), "success": False}), 500
 
 
+def setInternshipStatus(internshipIds, status):
+    with get_client().tx() as tx:
+        # Lock the rows first: a concurrent approve/reject of the same rows
+        # waits for this one to commit and then sees the new statuses, so each
+        # change is counted and published once
+        rows = tx.query_raw(
+            "SELECT id, status FROM Internship WHERE id IN ({0}) FOR UPDATE".format(
+                ", ".join("?" * len(internshipIds))
+            ),
+            *internshipIds,
+        )
+        found = {row["id"] for row in rows}
+        prior = {row["id"]: row["status"] for row in rows if row["status"] != status}
+
+        for prior_status in set(prior.values()):
+            Internship.prisma(tx).update_many(
+                where={
+                    "id": {"in": [i for i, s in prior.items() if s == prior_status]},
+                    "status": prior_status,
+                },
+                data={"status": status},
+            )
+
+        changed = []
+        if prior:
+            changed = Internship.prisma(tx).find_many(
+                where={"id": {"in": list(prior)}}, include={"student": True}
+            )
+
+    for internship in changed:
+        publish_internship_status(internship, internship.student, status)
+
+    updated = set(prior)
+    results = []
+    for internshipId in internshipIds:
+        if internshipId not in found:
+            result = "NOT_FOUND"
+        elif internshipId in updated:
+            result = "UPDATED"
+        else:
+            result = "UNCHANGED"
+        results.append({"internshipId": internshipId, "result": result})
+
+    return {"updated": len(updated), "results": results}
+
+
+@admins.route("/students/approve-bulk", methods=["POST"])
+@admin_token_required
+def approveInternships(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        internshipIds = parse_bulk_list(data, "internshipIds")
+
+        return jsonify(
+            {
+                "message": "Internships approved successfully",
+                "data": setInternshipStatus(internshipIds, "APPROVED"),
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/students/reject-bulk", methods=["POST"])
+@admin_token_required
+def rejectInternships(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        internshipIds = parse_bulk_list(data, "internshipIds")
+
+        return jsonify(
+            {
+                "message": "Internships rejected successfully",
+                "data": setInternshipStatus(internshipIds, "REJECTED"),
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/students/import", methods=["POST"])
+@admin_token_required
+def importStudents(user):
+    try:
+        format = request.args.get("format")
+        if format is None:
+            format = "jsonl" if "json" in (request.mimetype or "") else "csv"
+
+        if format not in ("csv", "jsonl"):
+            return jsonify({"message": "Unsupported format", "success": False}), 400
+
+        result = StudentImport()
+        result.run(read_rows(request.stream, format))
+
+        return jsonify(
+            {
+                "message": "Students imported successfully",
+                "data": result.summary(),
+                "success": True,
+            }
+        )
+    except ImportFormatError as e:
+        # Batches before the bad line are already saved; report them too
+        return (
+            jsonify({"message": str(e), "data": result.summary(), "success": False}),
+            400,
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
 @admins.route("/companies", methods=["GET"])
 @admin_token_required
 def getCompanies(user):
     try:
-        companies = Company.prisma().find_many(order={"createdAt": "desc"})
+        query = {
+            "sort_fields": ["createdAt", "companyName", "email"],
+            "id_field": "email",
+            "filters": {"isApproved": boolean("isApproved")},
+        }
+        if wants_stream():
+            return stream_list(
+                iterate(Company.prisma(), **query),
+                serializers.company,
+                parse_fields(),
+                message="Companies fetched successfully",
+                success=True,
+            )
+
+        companies, next_cursor = paginate(Company.prisma(), **query)
         return jsonify(
             {
                 "message": "Companies fetched successfully",
-                "data": [
-                    {
-                        "email": company.email,
-                        "companyName": company.companyName,
-                        "isApproved": company.isApproved,
-                        "createdAt": company.createdAt.isoformat(),
-                    }
-                    for company in companies
-                ],
+                "data": prune(
+                    list(map(serializers.company, companies)), parse_fields()
+                ),
+                "nextCursor": next_cursor,
                 "success": True,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -259,22 +492,51 @@ def getCompanies(user):
 @admins.route("/announcements", methods=["GET"])
 def getAnnouncements():
     try:
-        announcements = Announcement.prisma().find_many(order={"postedAt": "desc"})
-        return jsonify(
-            {
+        since = request.args.get("since")
+
+        # Incremental fetch: only what changed after the client's version,
+        # answered from the in-memory snapshot
+        if since:
+            try:
+                since = announcement_feed.parse_since(since)
+            except ValueError:
+                return jsonify({"message": "Invalid since", "success": False}), 400
+
+            changed, deleted, full, latest = announcement_feed.changes_since(since)
+            return jsonify(
+                {
+                    "message": "Announcement fetched successfully",
+                    "data": list(map(serializers.announcement, changed)),
+                    "deleted": deleted,
+                    "full": full,
+                    "version": max(latest, since),
+                    "success": True,
+                }
+            )
+
+        query = {
+            "sort_fields": ["postedAt", "title"],
+            "id_field": "id",
+            "where": {"deletedAt": None},
+        }
+
+        def build():
+            announcements, next_cursor = paginate(Announcement.prisma(), **query)
+            return {
                 "message": "Announcement fetched successfully",
-                "data": [
-                    {
-                        "id": announcement.id,
-                        "title": announcement.title,
-                        "content": announcement.content,
-                        "postedAt": announcement.postedAt.isoformat(),
-                    }
-                    for announcement in announcements
-                ],
+                "data": list(map(serializers.announcement, announcements)),
+                "nextCursor": next_cursor,
+                "version": announcement_feed.snapshot()["latest"],
                 "success": True,
             }
+
+        version = cache_versions.current("announcements")
+        body, etag = announcements_cache.get_or_build(
+            request_key(version, page_query(**query)), build
         )
+        return cached_response(body, etag)
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -294,23 +556,30 @@ def createAnnouncement(user):
         if title is None or content is None:
             return {"message": "Missing required fields", "success": False}
 
-        announcement = Announcement.prisma().create(
-            data={
-                "title": title,
-                "content": content,
-                "admin": {"connect": {"email": user.email}},
-            }
+        announcement = announcement_feed.write(
+            lambda tx, version: Announcement.prisma(tx).create(
+                data={
+                    "title": title,
+                    "content": content,
+                    "version": version,
+                    "admin": {"connect": {"email": user.email}},
+                }
+            )
+        )
+        publish(
+            "announcement.created",
+            {
+                "id": announcement.id,
+                "title": announcement.title,
+                "content": announcement.content,
+                "postedAt": announcement.postedAt.isoformat(),
+            },
         )
 
         return jsonify(
             {
                 "message": "Announcement created successfully",
-                "data": {
-                    "id": announcement.id,
-                    "title": announcement.title,
-                    "content": announcement.content,
-                    "postedAt": announcement.postedAt.isoformat(),
-                },
+                "data": serializers.announcement(announcement),
                 "success": True,
             }
         )
@@ -335,10 +604,17 @@ def deleteAnnouncement(user):
 
         announcement = Announcement.prisma().find_unique(where={"id": id})
 
-        if announcement is None:
+        if announcement is None or announcement.deletedAt is not None:
             return {"message": "Announcement not found", "success": False}
 
-        Announcement.prisma().delete(where={"id": id})
+        # Keep a tombstone so polling clients learn about the deletion
+        announcement_feed.write(
+            lambda tx, version: Announcement.prisma(tx).update(
+                where={"id": id},
+                data={"deletedAt": datetime.now(timezone.utc), "version": version},
+            )
+        )
+        publish("announcement.deleted", {"id": id})
 
         return jsonify(
             {
@@ -368,14 +644,26 @@ def updateAnnouncement(user):
 
         announcement = Announcement.prisma().find_unique(where={"id": id})
 
-        if announcement is None:
+        if announcement is None or announcement.deletedAt is not None:
             return {"message": "Announcement not found", "success": False}
 
-        Announcement.prisma().update(
-            where={"id": id},
-            data={
-                "title": title,
-                "content": content,
+        announcement = announcement_feed.write(
+            lambda tx, version: Announcement.prisma(tx).update(
+                where={"id": id},
+                data={
+                    "title": title,
+                    "content": content,
+                    "version": version,
+                },
+            )
+        )
+        publish(
+            "announcement.updated",
+            {
+                "id": announcement.id,
+                "title": announcement.title,
+                "content": announcement.content,
+                "postedAt": announcement.postedAt.isoformat(),
             },
         )
 
@@ -387,3 +675,47 @@ def updateAnnouncement(user):
         )
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/stats", methods=["GET"])
+@admin_token_required
+def getStats(user):
+    try:
+        return jsonify(
+            {
+                "message": "Stats fetched successfully",
+                "data": admin_stats.get_stats(),
+                "success": True,
+            }
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/cache-stats", methods=["GET"])
+@admin_token_required
+def getCacheStats(user):
+    try:
+        return jsonify(
+            {
+                "message": "Cache stats fetched successfully",
+                "data": {
+                    "principals": principal_cache.stats(),
+                    "presignedUrls": presigned_url_cache.stats(),
+                    "jobboard": jobboard_cache.stats(),
+                    "announcements": announcements_cache.stats(),
+                },
+                "success": True,
+            }
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@admins.route("/events", methods=["GET"])
+@admin_token_required
+def adminEvents(user):
+    try:
+        return event_stream_response("admin", user.email)
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
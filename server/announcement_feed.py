@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from prisma import get_client
+from prisma.models import Announcement
+
+import cache_versions
+from config import announcement_tombstone_retention_days
+
+# Every announcement write stamps the row with the next value of the shared
+# "announcements" cache version, taken in the same transaction. The counter
+# only moves forward and writers are serialized on its row, so a client that
+# holds version N has seen every write numbered N or lower, whatever the app
+# nodes' clocks say.
+
+# In-memory snapshot of every live announcement plus recent tombstones,
+# rebuilt only when the "announcements" cache version changes
+_snapshot = None
+_lock = threading.Lock()
+
+
+def write(apply):
+    # apply(tx, version) performs the write; returns what apply returns
+    with get_client().tx() as tx:
+        version = cache_versions.bump("announcements", tx)
+        result = apply(tx, version)
+    cache_versions.remember("announcements", version)
+    return result
+
+
+def snapshot():
+    global _snapshot
+    version = cache_versions.current("announcements")
+
+    current = _snapshot
+    if current is not None and current["version"] == version:
+        return current
+
+    with _lock:
+        current = _snapshot
+        if current is not None and current["version"] == version:
+            return current
+
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            days=announcement_tombstone_retention_days
+        )
+        rows = Announcement.prisma().find_many(
+            where={"OR": [{"deletedAt": None}, {"deletedAt": {"gt": cutoff}}]},
+            order=[{"version": "asc"}, {"id": "asc"}],
+        )
+        # Clients behind the newest expired tombstone cannot be given a delta
+        expired = Announcement.prisma().find_first(
+            where={"deletedAt": {"lte": cutoff}}, order={"version": "desc"}
+        )
+        floor = 0 if expired is None else expired.version
+        _snapshot = {
+            "version": version,
+            "floor": floor,
+            "rows": rows,
+            "latest": max(rows[-1].version, floor) if rows else floor,
+        }
+        return _snapshot
+
+
+def parse_since(value):
+    since = int(value)
+    if since < 0:
+        raise ValueError("since must not be negative")
+    return since
+
+
+def changes_since(since):
+    feed = snapshot()
+
+    # Tombstones older than the retention window are gone, so a client that
+    # far behind has to replace its whole list
+    full = since < feed["floor"]
+    if full:
+        rows = [row for row in feed["rows"] if row.deletedAt is None]
+    else:
+        rows = [row for row in feed["rows"] if row.version > since]
+
+    changed = sorted(
+        (row for row in rows if row.deletedAt is None),
+        key=lambda row: row.postedAt,
+        reverse=True,
+    )
+    deleted = [row.id for row in rows if row.deletedAt is not None]
+    return changed, deleted, full, feed["latest"]
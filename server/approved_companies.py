@@ -0,0 +1,38 @@
+import threading
+import time
+
+from prisma import get_client
+from prisma.models import Company
+
+from config import approved_companies_ttl
+
+_emails = None
+_expires = 0
+_lock = threading.Lock()
+
+
+def _load():
+    global _emails, _expires
+    rows = get_client().query_raw("SELECT email FROM Company WHERE isApproved = 1")
+    with _lock:
+        _emails = frozenset(row["email"] for row in rows)
+        _expires = time.monotonic() + approved_companies_ttl
+    return _emails
+
+
+def is_approved(email):
+    emails = _emails
+    if emails is None or _expires <= time.monotonic():
+        emails = _load()
+    if email in emails:
+        return True
+
+    # Not in the cached set: the company may have been approved on another
+    # node since the last load, so check that one row
+    return Company.prisma().count(where={"email": email, "isApproved": True}) > 0
+
+
+def invalidate():
+    global _emails
+    with _lock:
+        _emails = None
@@ -2,7 +2,41 @@ from functools import wraps
 import jwt
 from flask import request
 from flask import current_app
-from prisma.models import Admin, Supervisor, Student, Company
+from prisma.partials import (
+    AdminPrincipal,
+    CompanyPrincipal,
+    StudentPrincipal,
+    SupervisorPrincipal,
+)
+
+from principal_cache import principal_cache
+from token_claims import principal_from_claims
+
+
+def _load_admin(decoded):
+    user = principal_from_claims("admin", decoded)
+    if user is None:
+        user = principal_cache.get_or_load(
+            "admin",
+            decoded["sub"],
+            lambda email: AdminPrincipal.prisma().find_unique(where={"email": email}),
+        )
+    return user
+
+
+def optional_admin():
+    # For public routes with admin-only options: the logged-in admin, or None
+    token = request.cookies.get("access_token_admin")
+    if not token:
+        return None
+
+    try:
+        decoded = jwt.decode(
+            token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
+        )
+    except jwt.InvalidTokenError:
+        return None
+    return _load_admin(decoded)
 
 
 def admin_token_required(f):
@@ -23,7 +57,7 @@ def admin_token_required(f):
             decoded = jwt.decode(
                 token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
             )
-            user = Admin.prisma().find_unique(where={"email": decoded["sub"]})
+            user = _load_admin(decoded)
             if user is None:
                 return {
                     "message": "Unauthorized admin",
@@ -60,7 +94,15 @@ def supervisor_token_required(f):
             decoded = jwt.decode(
                 token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
             )
-            user = Supervisor.prisma().find_unique(where={"email": decoded["sub"]})
+            user = principal_from_claims("supervisor", decoded)
+            if user is None:
+                user = principal_cache.get_or_load(
+                    "supervisor",
+                    decoded["sub"],
+                    lambda email: SupervisorPrincipal.prisma().find_unique(
+                        where={"email": email}
+                    ),
+                )
             if user is None:
                 return {
                     "message": "Unauthorized supervisor",
@@ -97,9 +139,15 @@ def student_token_required(f):
             decoded = jwt.decode(
                 token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
             )
-            user = Student.prisma().find_unique(
-                where={"email": decoded["sub"]}, include={"supervisor": True}
-            )
+            user = principal_from_claims("student", decoded)
+            if user is None:
+                user = principal_cache.get_or_load(
+                    "student",
+                    decoded["sub"],
+                    lambda email: StudentPrincipal.prisma().find_unique(
+                        where={"email": email}
+                    ),
+                )
             if user is None:
                 return {
                     "message": "Unauthorized student",
@@ -136,7 +184,15 @@ def company_token_required(f):
             decoded = jwt.decode(
                 token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
             )
-            user = Company.prisma().find_unique(where={"email": decoded["sub"]})
+            user = principal_from_claims("company", decoded)
+            if user is None:
+                user = principal_cache.get_or_load(
+                    "company",
+                    decoded["sub"],
+                    lambda email: CompanyPrincipal.prisma().find_unique(
+                        where={"email": email}
+                    ),
+                )
             if user is None:
                 return {
                     "message": "Unauthorized company",
@@ -0,0 +1,95 @@
+"""Shared setup for the benchmark scripts.
+
+The scripts run the real app in process against the database configured in
+schema.prisma, with progress reports kept in the in-memory storage backend.
+Run them from the server directory, e.g. ``python -m bench.roster_latency``.
+Every row they create uses the ``bench-`` prefix and is deleted afterwards.
+"""
+
+import os
+from datetime import datetime
+
+# Must be set before config is imported by the app
+os.environ.setdefault("GOINTERN_STORAGE_BACKEND", "memory")
+
+from flask_jwt_extended import create_access_token
+from prisma.models import Company, Internship, ProgressReport, Student, Supervisor
+
+from bench.timing import describe, timed
+from server import app
+
+prefix = "bench-"
+
+
+def login(client, role, email):
+    with app.app_context():
+        token = create_access_token(identity=email)
+    client.set_cookie("access_token_" + role, token)
+
+
+def seed_company():
+    email = prefix + "company@bench.local"
+    Company.prisma().upsert(
+        where={"email": email},
+        data={
+            "create": {
+                "email": email,
+                "companyName": "Bench Company",
+                "password": "bench",
+                "isApproved": True,
+            },
+            "update": {"isApproved": True},
+        },
+    )
+    return email
+
+
+def seed_roster(size, company_email, with_internships=True):
+    supervisor_email = "{0}supervisor-{1}@bench.local".format(prefix, size)
+    Supervisor.prisma().create(
+        data={
+            "email": supervisor_email,
+            "fullName": "Bench Supervisor",
+            "password": "bench",
+            "isApproved": True,
+        }
+    )
+
+    student_ids = ["{0}{1}-{2}".format(prefix, size, i) for i in range(size)]
+    Student.prisma().create_many(
+        data=[
+            {
+                "studentId": student_id,
+                "fullName": "Bench Student " + student_id,
+                "email": student_id + "@bench.local",
+                "icNumber": student_id,
+                "supervisorEmail": supervisor_email,
+            }
+            for student_id in student_ids
+        ]
+    )
+    if with_internships:
+        Internship.prisma().create_many(
+            data=[
+                {
+                    "studentId": student_id,
+                    "companyEmail": company_email,
+                    "startDate": datetime(2024, 1, 1),
+                    "endDate": datetime(2024, 6, 30),
+                    "allowance": 1000,
+                    "comSupervisorName": "Bench Mentor",
+                    "comSupervisorEmail": "mentor@bench.local",
+                }
+                for student_id in student_ids
+            ]
+        )
+    return supervisor_email, student_ids
+
+
+def cleanup():
+    bench = {"startswith": prefix}
+    ProgressReport.prisma().delete_many(where={"studentId": bench})
+    Internship.prisma().delete_many(where={"studentId": bench})
+    Student.prisma().delete_many(where={"studentId": bench})
+    Supervisor.prisma().delete_many(where={"email": bench})
+    Company.prisma().delete_many(where={"email": bench})
@@ -0,0 +1,102 @@
+"""Encode time for a 10k-row student list, before and after the serializers.
+
+"before" builds each dict by hand with isoformat() and encodes with Flask's
+default JSON provider, as the routes used to; "after" uses serializers.student
+and the orjson provider installed in server.py. No database is needed.
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import serializers
+from bench.timing import describe, timed
+from json_provider import OrjsonProvider
+
+
+def make_rows(count):
+    now = datetime.now(timezone.utc)
+    company = SimpleNamespace(companyName="Bench Company", email="hr@bench.local")
+    supervisor = SimpleNamespace(fullName="Bench Supervisor", email="sv@bench.local")
+    rows = []
+    for i in range(count):
+        internship = SimpleNamespace(
+            id="internship-{0}".format(i),
+            status="SUBMITTED",
+            company=company,
+            startDate=now,
+            endDate=now + timedelta(days=180),
+            allowance=1000.0 + i,
+            createdAt=now,
+            comSupervisorName="Bench Mentor",
+            comSupervisorEmail="mentor@bench.local",
+        )
+        rows.append(
+            SimpleNamespace(
+                studentId="student-{0}".format(i),
+                fullName="Bench Student {0}".format(i),
+                email="student-{0}@bench.local".format(i),
+                icNumber="ic-{0}".format(i),
+                createdAt=now,
+                supervisor=supervisor,
+                internship=internship,
+            )
+        )
+    return rows
+
+
+def hand_built(student):
+    internship = student.internship
+    return {
+        "studentId": student.studentId,
+        "fullName": student.fullName,
+        "email": student.email,
+        "icNumber": student.icNumber,
+        "createdAt": student.createdAt.isoformat(),
+        "supervisor": {
+            "fullName": student.supervisor.fullName,
+            "email": student.supervisor.email,
+        },
+        "internship": {
+            "id": internship.id,
+            "status": internship.status,
+            "company": {
+                "companyName": internship.company.companyName,
+                "email": internship.company.email,
+            },
+            "startDate": internship.startDate.isoformat(),
+            "endDate": internship.endDate.isoformat(),
+            "allowance": internship.allowance,
+            "createdAt": internship.createdAt.isoformat(),
+            "comSupervisorName": internship.comSupervisorName,
+            "comSupervisorEmail": internship.comSupervisorEmail,
+        },
+    }
+
+
+def run(count, repeat):
+    app = Flask(__name__)
+    rows = make_rows(count)
+    before = DefaultJSONProvider(app)
+    after = OrjsonProvider(app)
+
+    def encode_before():
+        before.dumps({"data": [hand_built(row) for row in rows], "success": True})
+
+    def encode_after():
+        after.dumps({"data": list(map(serializers.student, rows)), "success": True})
+
+    print("{0} rows, {1} runs each".format(count, repeat))
+    print("before  " + describe(timed(encode_before, repeat)))
+    print("after   " + describe(timed(encode_after, repeat)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,52 @@
+"""Serial vs concurrent HEAD lookups against storage with simulated latency.
+
+S3Storage.head_many fans HEAD requests out over a thread pool; the in-memory
+backend answers serially. This wraps MemoryStorage with a fixed per-request
+delay standing in for an S3 round trip and times both strategies as the number
+of keys grows. No database or S3 access is needed.
+"""
+
+import argparse
+import time
+
+from bench.timing import describe, timed
+from storage import MemoryStorage, head_concurrently, progress_report_key
+
+
+class LatentStorage(MemoryStorage):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def head(self, key):
+        time.sleep(self.latency)
+        return super().head(key)
+
+
+def run(sizes, latency, concurrency, repeat):
+    print("{0:g} ms per HEAD, {1} at a time".format(latency * 1000, concurrency))
+    print("{0:>6}  {1:<36}  {2}".format("keys", "serial", "concurrent"))
+    for size in sizes:
+        storage = LatentStorage(latency)
+        keys = [progress_report_key("bench-{0}".format(i)) for i in range(size)]
+        # Half the keys exist, as on a roster where not everyone has uploaded
+        for key in keys[::2]:
+            storage.put(key, b"%PDF-1.4\n", "application/pdf")
+
+        serial = timed(lambda: {key: storage.head(key) for key in keys}, repeat)
+        concurrent = timed(
+            lambda: head_concurrently(storage.head, keys, concurrency), repeat
+        )
+        print(
+            "{0:>6}  {1:<36}  {2}".format(size, describe(serial), describe(concurrent))
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.latency_ms / 1000, args.concurrency, args.repeat)
@@ -0,0 +1,61 @@
+"""getMyStudents latency against roster size.
+
+Every student has an internship and a stored progress report, so each request
+runs the roster query and signs one download URL per student. The first
+request per size is reported separately: it fills the principal and presigned
+URL caches.
+
+Report existence comes from the ProgressReport rows, so this request makes no
+HEAD calls; bench/head_latency.py measures the concurrent HEAD lookups that
+head_many still provides to the reconcile command.
+"""
+
+import argparse
+
+from bench.common import app, cleanup, describe, login, seed_company, seed_roster, timed
+from presigned_url_cache import presigned_url_cache
+from progress_reports import record_progress_report
+from storage import get_storage, progress_report_key
+
+report_body = b"%PDF-1.4\n" + b"0" * 64 * 1024
+
+
+def run(sizes, repeat):
+    storage = get_storage()
+    company_email = seed_company()
+    client = app.test_client()
+
+    print("{0:>8}  {1:>12}  {2}".format("students", "first", "warm"))
+    for size in sizes:
+        supervisor_email, student_ids = seed_roster(size, company_email)
+        for student_id in student_ids:
+            key = progress_report_key(student_id)
+            storage.put(key, report_body, "application/pdf")
+            record_progress_report(student_id, storage.head(key))
+
+        presigned_url_cache.clear()
+        login(client, "supervisor", supervisor_email)
+
+        def request():
+            response = client.get("/api/supervisors/my-students")
+            assert response.json["success"], response.json
+            assert len(response.json["data"]) == size
+
+        first = timed(request, 1)[0]
+        warm = describe(timed(request, repeat))
+        print("{0:>8}  {1:9.2f} ms  {2}".format(size, first, warm))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cleanup()
+    try:
+        run(args.sizes, args.repeat)
+    finally:
+        cleanup()
@@ -0,0 +1,81 @@
+"""Database round trips and latency per submitInternship call.
+
+Each student submits once (create) and then resubmits (update). The Prisma
+client's query execution is wrapped to count the operations sent to the query
+engine during each request. Only a student's first request includes the
+decorator's principal lookup and, once per approved_companies_ttl, the
+approved-company load; a steady-state submission is the single upsert.
+"""
+
+import argparse
+import statistics
+import time
+
+from prisma import get_client
+
+from bench.common import app, cleanup, describe, login, seed_company, seed_roster
+
+queries = []
+
+
+def count_queries(client):
+    execute = client._execute
+
+    def counted(*args, **kwargs):
+        queries.append(kwargs.get("method"))
+        return execute(*args, **kwargs)
+
+    client._execute = counted
+
+
+def run(students):
+    company_email = seed_company()
+    _, student_ids = seed_roster(students, company_email, with_internships=False)
+    count_queries(get_client())
+    client = app.test_client()
+
+    body = {
+        "startDate": "2024-01-01T00:00:00+00:00",
+        "endDate": "2024-06-30T00:00:00+00:00",
+        "companyEmail": company_email,
+        "allowance": 1000,
+        "comSupervisorName": "Bench Mentor",
+        "comSupervisorEmail": "mentor@bench.local",
+    }
+
+    results = {"create": ([], []), "resubmit": ([], [])}
+    for student_id in student_ids:
+        login(client, "student", student_id + "@bench.local")
+        for kind in ("create", "resubmit"):
+            del queries[:]
+            start = time.perf_counter()
+            response = client.post("/api/students/submit-internship", json=body)
+            elapsed = (time.perf_counter() - start) * 1000
+            assert response.json["success"], response.json
+
+            counts, samples = results[kind]
+            counts.append(len(queries))
+            samples.append(elapsed)
+
+    print("{0:>9}  {1:>7}  {2:>7}  {3}".format("", "queries", "max", "latency"))
+    for kind, (counts, samples) in results.items():
+        print(
+            "{0:>9}  {1:7.2f}  {2:7d}  {3}".format(
+                kind, statistics.mean(counts), max(counts), describe(samples)
+            )
+        )
+    # A resubmission finds the principal and the approved companies cached
+    steady = max(results["resubmit"][0])
+    print("steady-state queries per submission: {0}".format(steady))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+
+    cleanup()
+    try:
+        run(args.students)
+    finally:
+        cleanup()
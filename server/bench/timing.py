@@ -0,0 +1,19 @@
+import statistics
+import time
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def describe(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return "median {0:8.2f} ms  p95 {1:8.2f} ms".format(
+        statistics.median(ordered), p95
+    )
@@ -0,0 +1,68 @@
+"""Progress-report ZIP download for a supervisor with 100+ reports.
+
+Reports are incompressible random bytes, as PDFs mostly are. The script prints
+time to first byte, total time, throughput and the peak Python heap growth
+while the archive is streamed, which should stay near storage_chunk_size no
+matter how many reports there are.
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from bench.common import app, cleanup, login, seed_company, seed_roster
+from progress_reports import record_progress_report
+from storage import get_storage, progress_report_key
+
+
+def run(reports, report_size):
+    storage = get_storage()
+    supervisor_email, student_ids = seed_roster(
+        reports, seed_company(), with_internships=False
+    )
+    for student_id in student_ids:
+        key = progress_report_key(student_id)
+        storage.put(key, os.urandom(report_size), "application/pdf")
+        record_progress_report(student_id, storage.head(key))
+
+    client = app.test_client()
+    login(client, "supervisor", supervisor_email)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte = None
+    total = 0
+    response = client.get(
+        "/api/supervisors/my-students/progress-reports.zip", buffered=False
+    )
+    try:
+        for chunk in response.iter_encoded():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            total += len(chunk)
+    finally:
+        response.close()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("reports      {0} x {1} KiB".format(reports, report_size // 1024))
+    print("archive      {0:.1f} MiB".format(total / 2**20))
+    print("first byte   {0:.2f} ms".format(first_byte * 1000))
+    print("total        {0:.2f} s".format(elapsed))
+    print("throughput   {0:.1f} MiB/s".format(total / 2**20 / elapsed))
+    print("peak heap    {0:.1f} MiB".format(peak / 2**20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=150)
+    parser.add_argument("--report-size", type=int, default=512 * 1024)
+    args = parser.parse_args()
+
+    cleanup()
+    try:
+        run(args.reports, args.report_size)
+    finally:
+        cleanup()
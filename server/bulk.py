@@ -0,0 +1,20 @@
+from config import bulk_max_items
+
+
+class BulkRequestError(ValueError):
+    pass
+
+
+def parse_bulk_list(data, field):
+    values = data.get(field)
+    if not isinstance(values, list) or len(values) == 0:
+        raise BulkRequestError("Missing required fields")
+    if len(values) > bulk_max_items:
+        raise BulkRequestError(
+            "At most {0} items can be processed at once".format(bulk_max_items)
+        )
+    if not all(isinstance(value, str) for value in values):
+        raise BulkRequestError("Invalid " + field)
+
+    # Drop duplicates but keep the caller's order for the per-item results
+    return list(dict.fromkeys(values))
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from prisma.models import CacheVersion
+
+from config import cache_version_check_interval
+
+# Version counters live in the CacheVersion table so that a write on one node
+# invalidates the caches of the whole fleet. Each node re-reads a counter at
+# most once per cache_version_check_interval and sees its own bumps at once.
+_versions = {}
+_lock = threading.Lock()
+
+
+def current(name):
+    now = time.monotonic()
+    with _lock:
+        entry = _versions.get(name)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+    record = CacheVersion.prisma().find_unique(where={"name": name})
+    version = 0 if record is None else record.version
+
+    with _lock:
+        _versions[name] = (version, now + cache_version_check_interval)
+    return version
+
+
+def bump(name, tx=None):
+    # Inside a transaction the counter row stays locked until commit, which
+    # serializes writers; the caller calls remember() once it has committed
+    record = CacheVersion.prisma(tx).upsert(
+        where={"name": name},
+        data={
+            "create": {"name": name, "version": 1},
+            "update": {"version": {"increment": 1}},
+        },
+    )
+
+    if tx is None:
+        remember(name, record.version)
+    return record.version
+
+
+def remember(name, version):
+    with _lock:
+        entry = _versions.get(name)
+        if entry is None or entry[0] < version:
+            _versions[name] = (
+                version,
+                time.monotonic() + cache_version_check_interval,
+            )
@@ -2,11 +2,36 @@ from flask import Blueprint, current_app, jsonify, make_response, request
 from flask_jwt_extended import create_access_token, unset_jwt_cookies
 import jwt
 import prisma
+from prisma import get_client
 import boto3
 from config import *
 from prisma.models import Company, Job
-
-from auth_middleware import admin_token_required, company_token_required
+from prisma.partials import CompanyJob, JobBoardEntry
+
+import approved_companies
+from auth_middleware import (
+    admin_token_required,
+    company_token_required,
+    optional_admin,
+)
+from bulk import BulkRequestError, parse_bulk_list
+from events import event_stream_response
+from fields import parse_fields, prune, wants
+import cache_versions
+from job_search import search_jobs
+from json_stream import stream_list, wants_stream
+from pagination import (
+    PaginationError,
+    equals,
+    iterate,
+    page_query,
+    paginate,
+    parse_limit,
+)
+from principal_cache import principal_cache
+from response_cache import cached_response, jobboard_cache, request_key
+import serializers
+from token_claims import bump_version, principal_claims
 
 companies = Blueprint("companies", __name__)
 
@@ -33,6 +58,7 @@ def companySignUp():
                 "password": password,
             }
         )
+        principal_cache.invalidate("company", email)
 
         return jsonify(
             {
@@ -69,7 +95,10 @@ def companyLogin():
             return jsonify({"message": "Wrong password", "success": False})
 
         # Create access token
-        access_token = create_access_token(identity=company.email)
+        access_token = create_access_token(
+            identity=company.email,
+            additional_claims=principal_claims("company", company),
+        )
         response = make_response(
             jsonify(
                 {
@@ -124,11 +153,14 @@ def companyMe():
             {
                 "message": "Authorized company",
                 "success": True,
-                "data": {
-                    "email": user.email,
-                    "companyName": user.companyName,
-                    "isApproved": user.isApproved,
-                },
+                "data": prune(
+                    {
+                        "email": user.email,
+                        "companyName": user.companyName,
+                        "isApproved": user.isApproved,
+                    },
+                    parse_fields(),
+                ),
             }
         )
     except Exception as e:
@@ -181,6 +213,9 @@ def approveCompany(user):
                 "isApproved": True,
             },
         )
+        principal_cache.invalidate("company", email)
+        bump_version("company", email)
+        approved_companies.invalidate()
 
         return jsonify(
             {
@@ -192,27 +227,70 @@ def approveCompany(user):
         return jsonify({"message": str(e), "success": False}), 500
 
 
+@companies.route("/approve-bulk", methods=["POST"])
+@admin_token_required
+def approveCompanies(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        emails = parse_bulk_list(data, "emails")
+
+        with get_client().tx() as tx:
+            companies = Company.prisma(tx).find_many(where={"email": {"in": emails}})
+            Company.prisma(tx).update_many(
+                where={"email": {"in": emails}, "isApproved": False},
+                data={"isApproved": True},
+            )
+
+        known = {company.email: company.isApproved for company in companies}
+        approved = [email for email in emails if known.get(email) is False]
+        principal_cache.invalidate("company", *approved)
+        bump_version("company", *approved)
+        approved_companies.invalidate()
+
+        return jsonify(
+            {
+                "message": "Companies approved successfully",
+                "data": {
+                    "approved": approved,
+                    "alreadyApproved": [
+                        email for email in emails if known.get(email) is True
+                    ],
+                    "unknown": [email for email in emails if email not in known],
+                },
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
 @companies.route("", methods=["GET"])
 def getApprovedCompanies():
     try:
-        companies = Company.prisma().find_many(
-            where={"isApproved": True}, order={"createdAt": "desc"}
+        companies, next_cursor = paginate(
+            Company.prisma(),
+            ["createdAt", "companyName", "email"],
+            "email",
+            where={"isApproved": True},
         )
         return jsonify(
             {
                 "message": "Companies fetched successfully",
-                "data": [
-                    {
-                        "email": company.email,
-                        "companyName": company.companyName,
-                        "isApproved": company.isApproved,
-                        "createdAt": company.createdAt.isoformat(),
-                    }
-                    for company in companies
-                ],
+                "data": prune(
+                    list(map(serializers.company, companies)), parse_fields()
+                ),
+                "nextCursor": next_cursor,
                 "success": True,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -244,6 +322,7 @@ def addJob(company):
                 "description": description,
             }
         )
+        cache_versions.bump("jobboard")
 
         return jsonify(
             {
@@ -267,23 +346,12 @@ def addJob(company):
 @company_token_required
 def getJobs(company):
     try:
-        jobs = Job.prisma().find_many(
-            where={"companyEmail": company.email}, include={"company": True}
-        )
+        jobs = CompanyJob.prisma().find_many(where={"companyEmail": company.email})
 
         return jsonify(
             {
                 "message": "Jobs fetched successfully",
-                "data": [
-                    {
-                        "jobId": job.jobId,
-                        "title": job.title,
-                        "location": job.location,
-                        "salary": job.salary,
-                        "description": job.description,
-                    }
-                    for job in jobs
-                ],
+                "data": prune(list(map(serializers.job, jobs)), parse_fields()),
                 "success": True,
             }
         )
@@ -311,6 +379,7 @@ def deleteJob(company):
             return {"message": "Job not found", "success": False}
 
         Job.prisma().delete(where={"jobId": id})
+        cache_versions.bump("jobboard")
 
         return jsonify(
             {
@@ -354,6 +423,7 @@ def updateJob(company):
                 "description": description,
             },
         )
+        cache_versions.bump("jobboard")
 
         return jsonify(
             {
@@ -364,38 +434,225 @@ def updateJob(company):
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
+
+def parseJobBatch(data):
+    creates = data.get("create") or []
+    updates = data.get("update") or []
+    deletes = data.get("delete") or []
+
+    if not all(isinstance(ops, list) for ops in (creates, updates, deletes)):
+        raise BulkRequestError("Invalid batch")
+    if len(creates) + len(updates) + len(deletes) > bulk_max_items:
+        raise BulkRequestError(
+            "At most {0} items can be processed at once".format(bulk_max_items)
+        )
+
+    for index, job in enumerate(creates):
+        if not isinstance(job, dict) or any(
+            job.get(field) is None
+            for field in ("title", "location", "salary", "description")
+        ):
+            raise BulkRequestError(
+                "Missing required fields in create[{0}]".format(index)
+            )
+    seen = set()
+    for index, job in enumerate(updates):
+        if not isinstance(job, dict) or job.get("jobId") is None:
+            raise BulkRequestError("Missing jobId in update[{0}]".format(index))
+        if not isinstance(job["jobId"], str):
+            raise BulkRequestError("Invalid jobId in update[{0}]".format(index))
+        # Two updates of one job would be applied in an arbitrary order
+        if job["jobId"] in seen:
+            raise BulkRequestError("Duplicate jobId in update[{0}]".format(index))
+        seen.add(job["jobId"])
+    if not all(isinstance(jobId, str) for jobId in deletes):
+        raise BulkRequestError("Invalid delete")
+
+    # Deleting a job twice is the same as deleting it once
+    return creates, updates, list(dict.fromkeys(deletes))
+
+
+# Batch create/update/delete Jobs
+@companies.route("/jobs/batch", methods=["POST"])
+@company_token_required
+def batchJobs(company):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        creates, updates, deletes = parseJobBatch(data)
+        job_fields = ("title", "location", "salary", "description")
+
+        jobIds = list(dict.fromkeys([job["jobId"] for job in updates] + deletes))
+
+        # Everything is scoped to the calling company and applied atomically
+        with get_client().tx() as tx:
+            owned = set()
+            if jobIds:
+                owned = {
+                    job.jobId
+                    for job in Job.prisma(tx).find_many(
+                        where={"jobId": {"in": jobIds}, "companyEmail": company.email}
+                    )
+                }
+
+            created = 0
+            if creates:
+                created = Job.prisma(tx).create_many(
+                    data=[
+                        {
+                            **{f: job[f] for f in job_fields},
+                            "companyEmail": company.email,
+                        }
+                        for job in creates
+                    ]
+                )
+
+            updated = []
+            for job in updates:
+                if job["jobId"] in owned and job["jobId"] not in deletes:
+                    Job.prisma(tx).update_many(
+                        where={"jobId": job["jobId"], "companyEmail": company.email},
+                        data={f: job[f] for f in job_fields if job.get(f) is not None},
+                    )
+                    updated.append(job["jobId"])
+
+            deleted = [jobId for jobId in deletes if jobId in owned]
+            if deleted:
+                Job.prisma(tx).delete_many(
+                    where={"jobId": {"in": deleted}, "companyEmail": company.email}
+                )
+
+        if created or updated or deleted:
+            cache_versions.bump("jobboard")
+
+        return jsonify(
+            {
+                "message": "Jobs processed successfully",
+                "data": {
+                    "created": created,
+                    "updated": updated,
+                    "deleted": deleted,
+                    "notFound": [jobId for jobId in jobIds if jobId not in owned],
+                },
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
 # ----- Jobboard -----
 @companies.route("/jobboard", methods=["GET"])
 def retriveJobs():
     try:
-        jobs = Job.prisma().find_many(order={"postedAt": "desc"}, include={"company": True})
+
+        fields = parse_fields()
+        query = {
+            "sort_fields": ["postedAt", "salary", "title", "jobId"],
+            "id_field": "jobId",
+            "include": {"company": wants(fields, "company")},
+            "filters": {
+                "companyEmail": equals("companyEmail"),
+                "location": equals("location"),
+            },
+        }
+
+        # Full pulls are streamed rather than cached, so they are kept to admins
+        # instead of letting anonymous clients force uncached table scans
+        if wants_stream():
+            if optional_admin() is None:
+                return (
+                    jsonify(
+                        {
+                            "message": "Streaming requires an admin login",
+                            "success": False,
+                            "error": "Unauthorized",
+                        }
+                    ),
+                    401,
+                )
+            return stream_list(
+                iterate(JobBoardEntry.prisma(), **query),
+                serializers.job_board_entry,
+                fields,
+                message="Job fetched successfully",
+                success=True,
+            )
+
+        def build():
+            jobs, next_cursor = paginate(JobBoardEntry.prisma(), **query)
+            return {
+                "message": "Job fetched successfully",
+                "data": prune(list(map(serializers.job_board_entry, jobs)), fields),
+                "nextCursor": next_cursor,
+                "success": True,
+            }
+
+        # The body is cached per job board version and page query, so repeat
+        # views skip the query and the JSON encoding, and matching ETags get a 304
+        version = cache_versions.current("jobboard")
+        page = page_query(
+            query["sort_fields"], query["id_field"], filters=query["filters"]
+        )
+        body, etag = jobboard_cache.get_or_build(
+            request_key(version, page, fields), build
+        )
+        return cached_response(body, etag)
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@companies.route("/jobboard/search", methods=["GET"])
+def searchJobs():
+    try:
+        q = request.args.get("q", "")
+        limit = parse_limit(request.args)
+        page = request.args.get("page", "1")
+
+        if not page.isdigit() or int(page) < 1:
+            return jsonify({"message": "Invalid page", "success": False}), 400
+        page = int(page)
+
+        # Fetch one extra row to know whether there is a next page
+        jobs = search_jobs(q, limit + 1, (page - 1) * limit)
 
         return jsonify(
             {
                 "message": "Job fetched successfully",
                 "data": [
                     {
-                        "jobId": job.jobId,
-                        "title": job.title,
-                        "location": job.location,
-                        "salary": job.salary,
-                        "description": job.description,
-                        "postedAt": job.postedAt.isoformat(),
-                        "companyEmail": job.companyEmail,
-                        "company": job.company.companyName
+                        "jobId": job["jobId"],
+                        "title": job["title"],
+                        "location": job["location"],
+                        "salary": job["salary"],
+                        "description": job["description"],
+                        "postedAt": job["postedAt"],
+                        "companyEmail": job["companyEmail"],
+                        "company": job["companyName"],
+                        "score": job["score"],
                     }
-                    for job in jobs
+                    for job in jobs[:limit]
                 ],
+                "nextPage": page + 1 if len(jobs) > limit else None,
                 "success": True,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
-        
-
-
-
-
-        
 
+@companies.route("/events", methods=["GET"])
+@company_token_required
+def companyEvents(company):
+    try:
+        return event_stream_response("company", company.email)
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
@@ -1,2 +1,65 @@
+import os
+
 custom_bucket = "ohboonsuen-gointern"
-custom_region = "us-east-1"
\ No newline at end of file
+custom_region = "us-east-1"
+
+# Principal cache used by the auth_middleware token decorators
+principal_cache_ttl = 60
+principal_cache_max_size = 10000
+
+# Stateless JWT claims mode: when enabled, the token decorators trust the
+# role/approval/relationship claims embedded at login instead of querying the DB
+jwt_stateless_claims = False
+
+# Object storage used for progress reports ("s3", "local" or "memory")
+storage_backend = os.environ.get("GOINTERN_STORAGE_BACKEND", "s3")
+local_storage_root = os.environ.get("GOINTERN_LOCAL_STORAGE_ROOT", "storage")
+s3_max_pool_connections = 50
+s3_head_concurrency = 16
+storage_chunk_size = 64 * 1024
+presigned_url_expires_in = 3600
+
+# Signed download URLs are reused until this many seconds before they expire
+presigned_url_safety_margin = 300
+presigned_url_cache_max_size = 10000
+
+# Direct-to-storage progress report uploads
+progress_report_upload_expires_in = 600
+progress_report_max_size = 20 * 1024 * 1024
+progress_report_content_types = {
+    "pdf": "application/pdf",
+    "doc": "application/msword",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Keyset pagination for list endpoints
+default_page_size = 50
+max_page_size = 500
+
+# Largest number of ids/emails accepted by one bulk endpoint call
+bulk_max_items = 1000
+
+# Versioned response caches: how often a node re-reads the shared version
+# counters written by the other nodes, and how many bodies it keeps
+cache_version_check_interval = 2
+response_cache_max_size = 512
+
+# Deleted announcements are reported to polling clients for this long
+announcement_tombstone_retention_days = 30
+
+# Server-sent events
+sse_heartbeat_interval = 15
+sse_queue_size = 100
+# Recent events kept per node to replay to clients reconnecting with
+# Last-Event-ID
+sse_replay_size = 1000
+
+# Bulk student import
+import_batch_size = 1000
+import_max_errors = 1000
+
+# Admin dashboard aggregates are recomputed at most this often (seconds)
+stats_cache_ttl = 30
+
+# Approved company emails used to validate internship submissions
+approved_companies_ttl = 60
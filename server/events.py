@@ -0,0 +1,141 @@
+import json
+import queue
+import threading
+import uuid
+from collections import deque
+
+from flask import Response, request
+
+from config import sse_heartbeat_interval, sse_queue_size, sse_replay_size
+
+
+class LocalBroker:
+    # In-process pub/sub. A multi-node deployment can install a broker backed
+    # by an external pub/sub with set_broker(); it only has to provide the same
+    # publish/subscribe/unsubscribe methods and deliver every event, whichever
+    # node published it, to local subscribers and the replay history.
+    def __init__(self, queue_size=sse_queue_size, replay_size=sse_replay_size):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._history = deque(maxlen=replay_size)
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A stalled client must not block the publisher
+                pass
+
+    def subscribe(self, last_event_id=None):
+        # Returns the subscriber queue and the events published after
+        # last_event_id, or None as the backlog when that id is no longer (or
+        # was never) in the history. Both are taken under the lock, so no
+        # event is missed or delivered twice between backlog and queue.
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_event_id is None:
+                return subscriber, []
+
+            backlog = None
+            for index, event in enumerate(self._history):
+                if event["id"] == last_event_id:
+                    backlog = list(self._history)[index + 1 :]
+                    break
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+
+_broker = LocalBroker()
+
+
+def get_broker():
+    return _broker
+
+
+def set_broker(broker):
+    global _broker
+    _broker = broker
+
+
+def publish(event_type, data, **audience):
+    # audience holds the studentEmail/supervisorEmail/companyEmail the event
+    # concerns; events without one (announcements) go to everybody
+    get_broker().publish(
+        {"id": uuid.uuid4().hex, "type": event_type, "data": data, **audience}
+    )
+
+
+def publish_internship_status(internship, student, status=None):
+    publish(
+        "internship.status",
+        {
+            "id": internship.id,
+            "studentId": student.studentId,
+            "status": status or internship.status,
+        },
+        studentEmail=student.email,
+        supervisorEmail=student.supervisorEmail,
+        companyEmail=internship.companyEmail,
+    )
+
+
+def audience_filter(role, email):
+    def matches(event):
+        if role == "admin" or event["type"].startswith("announcement."):
+            return True
+        return event.get(role + "Email") == email
+
+    return matches
+
+
+def _format(event):
+    return "id: {0}\nevent: {1}\ndata: {2}\n\n".format(
+        event["id"], event["type"], json.dumps(event["data"])
+    )
+
+
+def _stream(matches, last_event_id):
+    broker = get_broker()
+    subscriber, backlog = broker.subscribe(last_event_id)
+    try:
+        yield "retry: 5000\n\n"
+
+        # The events missed since Last-Event-ID are gone from the history, so
+        # the client has to reload its state
+        if backlog is None:
+            yield "event: resync\ndata: {}\n\n"
+            backlog = []
+        for event in backlog:
+            if matches(event):
+                yield _format(event)
+
+        while True:
+            try:
+                event = subscriber.get(timeout=sse_heartbeat_interval)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+
+            if matches(event):
+                yield _format(event)
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+def event_stream_response(role, email):
+    # Browsers resend the id of the last event they received on reconnect
+    last_event_id = request.headers.get("Last-Event-ID") or None
+    return Response(
+        _stream(audience_filter(role, email), last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,65 @@
+from flask import request
+
+
+def parse_fields(args=None):
+    # "studentId,internship.status" becomes
+    # {"studentId": True, "internship": {"status": True}}
+    value = (request.args if args is None else args).get("fields")
+    if not value:
+        return None
+
+    tree = {}
+    for path in value.split(","):
+        parts = [part.strip() for part in path.split(".")]
+        if "" in parts:
+            continue
+
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                # The whole parent object was already asked for
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def wants(fields, path):
+    if fields is None:
+        return True
+
+    node = fields
+    for part in path.split("."):
+        if node is True:
+            return True
+        if part not in node:
+            return False
+        node = node[part]
+    return True
+
+
+def prune(data, fields):
+    if fields is None or fields is True:
+        return data
+    if isinstance(data, list):
+        return [prune(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: prune(data[key], sub) for key, sub in fields.items() if key in data}
+
+
+def prune_include(include, fields):
+    # Drop the relations nobody asked for, so their joins are never run
+    if fields is None or fields is True:
+        return include
+
+    pruned = {}
+    for key, value in include.items():
+        if key not in fields:
+            continue
+        if isinstance(value, dict) and "include" in value:
+            value = {**value, "include": prune_include(value["include"], fields[key])}
+        pruned[key] = value
+    return pruned
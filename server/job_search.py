@@ -0,0 +1,45 @@
+import re
+
+from prisma import get_client
+
+# Both MATCH branches hit their own FULLTEXT index (Job and Company), and the
+# scores are summed per job. Company name matches weigh double.
+search_sql = """
+SELECT j.jobId, j.title, j.description, j.location, j.salary, j.postedAt,
+       j.companyEmail, c.companyName, m.score
+FROM (
+    SELECT hits.jobId, SUM(hits.score) AS score
+    FROM (
+        SELECT jobId,
+               MATCH(title, description, location) AGAINST (? IN BOOLEAN MODE) AS score
+        FROM Job
+        WHERE MATCH(title, description, location) AGAINST (? IN BOOLEAN MODE)
+        UNION ALL
+        SELECT j.jobId, 2 * MATCH(c.companyName) AGAINST (? IN BOOLEAN MODE)
+        FROM Company c
+        JOIN Job j ON j.companyEmail = c.email
+        WHERE MATCH(c.companyName) AGAINST (? IN BOOLEAN MODE)
+    ) hits
+    GROUP BY hits.jobId
+) m
+JOIN Job j ON j.jobId = m.jobId
+JOIN Company c ON c.email = j.companyEmail
+ORDER BY m.score DESC, j.postedAt DESC, j.jobId DESC
+LIMIT ? OFFSET ?
+"""
+
+
+def boolean_query(text):
+    # Strip the boolean-mode operators from user input and prefix-match every term
+    terms = re.findall(r"\w+", text)
+    return " ".join(term + "*" for term in terms)
+
+
+def search_jobs(text, limit, offset):
+    query = boolean_query(text)
+    if query == "":
+        return []
+
+    return get_client().query_raw(
+        search_sql, query, query, query, query, limit, offset
+    )
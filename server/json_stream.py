@@ -0,0 +1,39 @@
+from flask import Response, current_app, request
+
+from config import storage_chunk_size
+from fields import prune
+
+
+def wants_stream(args=None):
+    return (request.args if args is None else args).get("stream") == "true"
+
+
+def stream_list(items, encode, fields=None, **envelope):
+    # Streams {"data": [...], **envelope}, writing the array element by element
+    # as items is consumed, so only one row and one output chunk are in memory
+    # Bound now: the generator runs after the app context is gone
+    dumps = current_app.json.dumps
+    mimetype = current_app.json.mimetype
+    tail = dumps(envelope)[1:]
+
+    def generate():
+        # The opening goes out before the first query runs
+        yield '{"data":['
+
+        buffer = []
+        size = 0
+        separator = ""
+        for item in items:
+            chunk = separator + dumps(prune(encode(item), fields))
+            separator = ","
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= storage_chunk_size:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+
+        buffer.append("]}" if tail == "}" else "]," + tail)
+        yield "".join(buffer)
+
+    return Response(generate(), mimetype=mimetype)
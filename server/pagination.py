@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import request
+
+from config import default_page_size, max_page_size
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def equals(field):
+    return lambda value: {field: value}
+
+
+def boolean(field):
+    def build(value):
+        if value.lower() not in ("true", "false"):
+            raise PaginationError("Invalid value for " + field)
+        return {field: value.lower() == "true"}
+
+    return build
+
+
+def encode_cursor(sort, sort_value, id_value):
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    raw = json.dumps([sort, sort_value, id_value]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort, sort_value, id_value = json.loads(raw)
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PaginationError("Invalid cursor")
+    return sort, sort_value, id_value
+
+
+def parse_limit(args):
+    limit = args.get("limit", default_page_size)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError("Invalid limit")
+    if limit < 1:
+        raise PaginationError("Invalid limit")
+    return min(limit, max_page_size)
+
+
+def page_query(sort_fields, id_field, where=None, filters=None, args=None):
+    if args is None:
+        args = request.args
+
+    sort = args.get("sort", sort_fields[0])
+    if sort not in sort_fields:
+        raise PaginationError("Invalid sort field")
+
+    order = args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise PaginationError("Invalid order")
+
+    conditions = [where] if where else []
+    for name, build in (filters or {}).items():
+        value = args.get(name)
+        if value is not None and value != "":
+            conditions.append(build(value))
+
+    # Keyset condition: rows strictly after (sort value, id) of the last row
+    cursor = args.get("cursor")
+    if cursor:
+        cursor_sort, sort_value, id_value = decode_cursor(cursor)
+        if cursor_sort != sort:
+            raise PaginationError("Cursor does not match the sort field")
+        op = "lt" if order == "desc" else "gt"
+        conditions.append(
+            {
+                "OR": [
+                    {sort: {op: sort_value}},
+                    {sort: sort_value, id_field: {op: id_value}},
+                ]
+            }
+        )
+
+    return {
+        "where": {"AND": conditions} if conditions else {},
+        "order": [{sort: order}, {id_field: order}],
+        "sort": sort,
+        "limit": parse_limit(args),
+    }
+
+
+def paginate(
+    delegate, sort_fields, id_field, where=None, include=None, filters=None, args=None
+):
+    query = page_query(sort_fields, id_field, where, filters, args)
+    limit = query["limit"]
+    items = delegate.find_many(
+        where=query["where"],
+        include=include,
+        order=query["order"],
+        take=limit + 1,
+    )
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            query["sort"], getattr(last, query["sort"]), getattr(last, id_field)
+        )
+
+    return items, next_cursor
+
+
+def iterate(
+    delegate, sort_fields, id_field, where=None, include=None, filters=None, args=None
+):
+    # Copy the query string now: the rows are usually consumed by a streamed
+    # response, after the request context is gone
+    args = dict((request.args if args is None else args).items())
+    args.pop("cursor", None)
+    args["limit"] = str(max_page_size)
+    page_query(sort_fields, id_field, where, filters, args)
+
+    def generate():
+        while True:
+            items, next_cursor = paginate(
+                delegate, sort_fields, id_field, where, include, filters, args
+            )
+            yield from items
+            if next_cursor is None:
+                return
+            args["cursor"] = next_cursor
+
+    return generate()
@@ -0,0 +1,114 @@
+from prisma.models import (
+    Admin,
+    Company,
+    Internship,
+    Job,
+    ProgressReport,
+    Student,
+    Supervisor,
+)
+
+# Per-route projections. Querying through a partial model only selects the
+# fields it declares, so each endpoint reads exactly the columns and relations
+# it serializes. Regenerate the client (prisma generate) after editing.
+
+# auth_middleware token decorators
+Admin.create_partial("AdminPrincipal", include={"email"})
+Supervisor.create_partial("SupervisorPrincipal", include={"email", "isApproved"})
+Company.create_partial("CompanyPrincipal", include={"email", "isApproved"})
+Student.create_partial(
+    "StudentPrincipal", include={"studentId", "email", "supervisorEmail"}
+)
+
+# Nested references
+Company.create_partial("CompanyName", include={"email", "companyName"})
+Supervisor.create_partial("SupervisorName", include={"email", "fullName"})
+Internship.create_partial("InternshipRef", include={"id"})
+ProgressReport.create_partial(
+    "ProgressReportRef", include={"key", "etag", "uploadedAt"}
+)
+Internship.create_partial(
+    "InternshipDetail",
+    include={
+        "id",
+        "status",
+        "company",
+        "startDate",
+        "endDate",
+        "allowance",
+        "createdAt",
+        "comSupervisorName",
+        "comSupervisorEmail",
+    },
+    relations={"company": "CompanyName"},
+)
+
+# students.getProgressReport
+Student.create_partial(
+    "StudentProgressReport",
+    include={"studentId", "internship", "progressReport"},
+    relations={"internship": "InternshipRef", "progressReport": "ProgressReportRef"},
+)
+
+# supervisors.getMyStudents
+Student.create_partial(
+    "RosterStudent",
+    include={
+        "studentId",
+        "email",
+        "fullName",
+        "icNumber",
+        "supervisor",
+        "internship",
+        "progressReport",
+    },
+    relations={
+        "supervisor": "SupervisorName",
+        "internship": "InternshipDetail",
+        "progressReport": "ProgressReportRef",
+    },
+)
+
+# admins.getStudents and admins.exportStudents
+Student.create_partial(
+    "ReportStudent",
+    include={"studentId", "fullName", "email", "icNumber", "createdAt", "supervisor"},
+    relations={"supervisor": "SupervisorName"},
+)
+Internship.create_partial(
+    "StudentReportInternship",
+    include={
+        "id",
+        "status",
+        "company",
+        "student",
+        "startDate",
+        "endDate",
+        "allowance",
+        "createdAt",
+        "comSupervisorName",
+        "comSupervisorEmail",
+    },
+    relations={"company": "CompanyName", "student": "ReportStudent"},
+)
+
+# companies.getJobs
+Job.create_partial(
+    "CompanyJob", include={"jobId", "title", "location", "salary", "description"}
+)
+
+# companies.retriveJobs
+Job.create_partial(
+    "JobBoardEntry",
+    include={
+        "jobId",
+        "title",
+        "location",
+        "salary",
+        "description",
+        "postedAt",
+        "companyEmail",
+        "company",
+    },
+    relations={"company": "CompanyName"},
+)
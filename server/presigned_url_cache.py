@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    presigned_url_cache_max_size,
+    presigned_url_expires_in,
+    presigned_url_safety_margin,
+)
+from storage import get_storage
+
+
+class PresignedUrlCache:
+    def __init__(
+        self,
+        max_size=presigned_url_cache_max_size,
+        expires_in=presigned_url_expires_in,
+        safety_margin=presigned_url_safety_margin,
+    ):
+        self.max_size = max_size
+        self.expires_in = expires_in
+        self.safety_margin = safety_margin
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_url(self, key, etag):
+        now = time.monotonic()
+
+        # An entry only matches the object version (ETag) it was signed for
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        url = get_storage().presign_get(key, self.expires_in)
+
+        with self._lock:
+            reuse_until = now + self.expires_in - self.safety_margin
+            self._entries[key] = (etag, url, reuse_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return url
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+presigned_url_cache = PresignedUrlCache()
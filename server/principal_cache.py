@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import principal_cache_max_size, principal_cache_ttl
+
+# Marker for principals that do not exist, so repeated bad tokens skip the DB too
+_MISSING = object()
+
+
+class PrincipalCache:
+    def __init__(self, max_size=principal_cache_max_size, ttl=principal_cache_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, role, email, loader):
+        key = (role, email)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return None if entry[0] is _MISSING else entry[0]
+            self.misses += 1
+
+        user = loader(email)
+
+        with self._lock:
+            self._entries[key] = (_MISSING if user is None else user, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return user
+
+    def invalidate(self, role, *emails):
+        with self._lock:
+            for email in emails:
+                if self._entries.pop((role, email), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache()
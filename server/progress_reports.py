@@ -0,0 +1,18 @@
+from prisma.models import ProgressReport
+
+
+def record_progress_report(student_id, report):
+    fields = {
+        "key": report["key"],
+        "size": report["size"],
+        "contentType": report["contentType"],
+        "etag": report["etag"],
+        "uploadedAt": report["lastModified"],
+    }
+    return ProgressReport.prisma().upsert(
+        where={"studentId": student_id},
+        data={
+            "create": {**fields, "student": {"connect": {"studentId": student_id}}},
+            "update": fields,
+        },
+    )
@@ -0,0 +1,68 @@
+import argparse
+import re
+
+from prisma import Prisma, register
+from prisma.models import ProgressReport, Student
+
+from progress_reports import record_progress_report
+from storage import get_storage
+
+key_pattern = re.compile(r"^progress-reports/progress-report-(.+)\.[^./]+$")
+
+
+def reconcile(prune=False):
+    storage = get_storage()
+    student_ids = {student.studentId for student in Student.prisma().find_many()}
+
+    reports = {}
+    skipped = 0
+    for report in storage.list("progress-reports/"):
+        match = key_pattern.match(report["key"])
+        if match is None or match.group(1) not in student_ids:
+            skipped += 1
+            continue
+        reports[report["key"]] = (match.group(1), report)
+
+    # Listings carry no content type; fetch it for those objects concurrently
+    missing = [key for key, (_, report) in reports.items() if not report["contentType"]]
+    heads = storage.head_many(missing)
+
+    seen = set()
+    recorded = 0
+    for key, (student_id, report) in reports.items():
+        report = heads.get(key) or report
+        record_progress_report(student_id, report)
+        seen.add(student_id)
+        recorded += 1
+
+    pruned = 0
+    if prune:
+        pruned = ProgressReport.prisma().delete_many(
+            where={"studentId": {"not_in": list(seen)}}
+        )
+
+    print(
+        "Recorded {0} progress reports, skipped {1} objects, pruned {2} rows".format(
+            recorded, skipped, pruned
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill the ProgressReport table from the objects in storage"
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete ProgressReport rows whose object no longer exists",
+    )
+    args = parser.parse_args()
+
+    db = Prisma()
+    db.connect()
+    register(db)
+    try:
+        reconcile(prune=args.prune)
+    finally:
+        db.disconnect()
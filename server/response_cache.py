@@ -0,0 +1,70 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from config import response_cache_max_size
+
+
+class ResponseCache:
+    def __init__(self, max_size=response_cache_max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Serialize once; every later hit reuses the encoded body and its ETag
+        body = current_app.json.dumps(build()).encode()
+        entry = (body, hashlib.sha1(body).hexdigest())
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def request_key(version, page, fields=None):
+    # Built from the parsed page query (sort, order, limit, cursor, filters)
+    # and fields rather than the raw query string, so equivalent requests share
+    # an entry and unknown parameters cannot force a rebuild
+    return (version, json.dumps([page, fields], sort_keys=True, default=str))
+
+
+def cached_response(body, etag):
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    # Answers 304 Not Modified when the client already has this ETag
+    return response.make_conditional(request)
+
+
+jobboard_cache = ResponseCache()
+announcements_cache = ResponseCache()
@@ -0,0 +1,83 @@
+from operator import attrgetter
+
+# Per-model encoders shared by the routes. Datetimes are passed through as-is;
+# the app's JSON provider encodes them as ISO 8601.
+
+
+def encoder(*fields):
+    # Resolve the attribute lookups once; a single attrgetter call then reads
+    # every field of a row
+    get = attrgetter(*fields)
+
+    def encode(obj):
+        return dict(zip(fields, get(obj)))
+
+    return encode
+
+
+def optional(encode, obj):
+    return None if obj is None else encode(obj)
+
+
+company_ref = encoder("companyName", "email")
+supervisor_ref = encoder("fullName", "email")
+
+company = encoder("email", "companyName", "isApproved", "createdAt")
+supervisor = encoder("email", "fullName", "isApproved", "createdAt")
+student_ref = encoder("studentId", "fullName", "email", "icNumber")
+student_summary = encoder("studentId", "fullName", "email", "icNumber", "createdAt")
+announcement = encoder("id", "title", "content", "postedAt")
+job = encoder("jobId", "title", "location", "salary", "description")
+
+_internship = encoder(
+    "id",
+    "status",
+    "startDate",
+    "endDate",
+    "allowance",
+    "createdAt",
+    "comSupervisorName",
+    "comSupervisorEmail",
+)
+_job_board_entry = encoder(
+    "jobId",
+    "title",
+    "location",
+    "salary",
+    "description",
+    "postedAt",
+    "companyEmail",
+)
+
+
+def internship(obj):
+    if obj is None:
+        return None
+
+    data = _internship(obj)
+    data["company"] = optional(company_ref, obj.company)
+    return data
+
+
+def student(obj, internship_obj=None):
+    # internship_obj is passed when the row was loaded from the internship side
+    data = student_summary(obj)
+    data["supervisor"] = optional(supervisor_ref, obj.supervisor)
+    data["internship"] = internship(
+        obj.internship if internship_obj is None else internship_obj
+    )
+    return data
+
+
+def roster_student(obj, downloadUrl):
+    data = student_ref(obj)
+    data["supervisor"] = optional(supervisor_ref, obj.supervisor)
+    data["internship"] = internship(obj.internship)
+    data["downloadUrl"] = downloadUrl
+    return data
+
+
+def job_board_entry(obj):
+    data = _job_board_entry(obj)
+    data["company"] = obj.company and obj.company.companyName
+    return data
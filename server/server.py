@@ -4,9 +4,10 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 import os
-import boto3
 from config import *
+from json_provider import OrjsonProvider
 from prisma import Prisma, register
+from storage import get_storage
 
 from students.routes import students
 from supervisors.routes import supervisors
@@ -17,7 +18,12 @@ db = Prisma()
 db.connect()
 register(db)
 
+# Build the storage client (and resolve the bucket region) once per worker
+get_storage()
+
 app = Flask(__name__)
+# orjson-backed jsonify; datetimes are encoded as ISO 8601
+app.json = OrjsonProvider(app)
 app.config["CORS_HEADERS"] = "Content-Type"
 app.config["JWT_SECRET_KEY"] = "super-secret"
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=7)
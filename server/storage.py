@@ -0,0 +1,251 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from config import *
+
+
+def progress_report_key(student_id, extension="pdf"):
+    return "progress-reports/progress-report-" + student_id + "." + extension
+
+
+def head_concurrently(head, keys, concurrency=s3_head_concurrency):
+    keys = list(keys)
+    if len(keys) <= 1:
+        return {key: head(key) for key in keys}
+
+    # Fan the HEAD requests out over the shared connection pool so the
+    # latency stays roughly flat as the number of keys grows
+    with ThreadPoolExecutor(max_workers=min(len(keys), concurrency)) as executor:
+        return dict(zip(keys, executor.map(head, keys)))
+
+
+class S3Storage:
+    def __init__(self, bucket, region=None):
+        self.bucket = bucket
+        config = Config(
+            max_pool_connections=s3_max_pool_connections,
+            retries={"max_attempts": 3, "mode": "standard"},
+        )
+
+        # Resolve the bucket region once so every later call (and every
+        # presigned URL) goes straight to the regional endpoint
+        if region is None:
+            location = boto3.client("s3", config=config).get_bucket_location(
+                Bucket=bucket
+            )
+            region = location["LocationConstraint"] or "us-east-1"
+        self.region = region
+
+        self.client = boto3.session.Session().client(
+            "s3", region_name=region, config=config
+        )
+
+    def put(self, key, body, content_type=None):
+        extra = {}
+        if content_type:
+            extra["ContentType"] = content_type
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body, **extra)
+
+    def head(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+        return {
+            "key": key,
+            "size": response["ContentLength"],
+            "etag": response["ETag"].strip('"'),
+            "contentType": response.get("ContentType"),
+            "lastModified": response["LastModified"],
+        }
+
+    def head_many(self, keys):
+        return head_concurrently(self.head, keys)
+
+    def iter_chunks(self, key, chunk_size=storage_chunk_size):
+        body = self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield {
+                    "key": obj["Key"],
+                    "size": obj["Size"],
+                    "etag": obj["ETag"].strip('"'),
+                    "contentType": None,
+                    "lastModified": obj["LastModified"],
+                }
+
+    def presign_get(self, key, expires_in=presigned_url_expires_in):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_in,
+        )
+
+    def presign_post(self, key, content_type, max_size, expires_in):
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires_in,
+        )
+
+
+class MemoryStorage:
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key, data, content_type):
+        with self._lock:
+            self._objects[key] = {
+                "data": data,
+                "contentType": content_type,
+                "lastModified": datetime.now(timezone.utc),
+            }
+
+    def _load(self, key):
+        with self._lock:
+            return self._objects.get(key)
+
+    def _keys(self):
+        with self._lock:
+            return sorted(self._objects)
+
+    def put(self, key, body, content_type=None):
+        data = body if isinstance(body, bytes) else body.read()
+        self._store(key, data, content_type)
+
+    def head(self, key):
+        obj = self._load(key)
+        if obj is None:
+            return None
+
+        return {
+            "key": key,
+            "size": len(obj["data"]),
+            "etag": hashlib.md5(obj["data"]).hexdigest(),
+            "contentType": obj["contentType"],
+            "lastModified": obj["lastModified"],
+        }
+
+    def head_many(self, keys):
+        return {key: self.head(key) for key in keys}
+
+    def iter_chunks(self, key, chunk_size=storage_chunk_size):
+        obj = self._load(key)
+        if obj is None:
+            raise FileNotFoundError(key)
+
+        data = obj["data"]
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+    def list(self, prefix):
+        for key in self._keys():
+            if key.startswith(prefix):
+                yield self.head(key)
+
+    def presign_get(self, key, expires_in=presigned_url_expires_in):
+        return "memory://" + key
+
+    def presign_post(self, key, content_type, max_size, expires_in):
+        return {
+            "url": self.presign_get(key, expires_in),
+            "fields": {"key": key, "Content-Type": content_type},
+        }
+
+
+class LocalStorage(MemoryStorage):
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def _store(self, key, data, content_type):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _load(self, key):
+        path = self._path(key)
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, "rb") as f:
+            data = f.read()
+        return {
+            "data": data,
+            "contentType": None,
+            "lastModified": datetime.fromtimestamp(
+                os.path.getmtime(path), timezone.utc
+            ),
+        }
+
+    def iter_chunks(self, key, chunk_size=storage_chunk_size):
+        with open(self._path(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _keys(self):
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.relpath(os.path.join(directory, name), self.root)
+                keys.append(path.replace(os.sep, "/"))
+        return sorted(keys)
+
+    def presign_get(self, key, expires_in=presigned_url_expires_in):
+        return "file://" + self._path(key)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend=storage_backend):
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "local":
+        return LocalStorage(local_storage_root)
+    return S3Storage(custom_bucket)
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage):
+    global _storage
+    _storage = storage
@@ -0,0 +1,118 @@
+import csv
+import io
+import os
+import tempfile
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+except ImportError:
+    openpyxl = None
+
+from config import storage_chunk_size
+
+xlsx_mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+columns = [
+    "studentId",
+    "fullName",
+    "email",
+    "icNumber",
+    "supervisorName",
+    "supervisorEmail",
+    "internshipId",
+    "status",
+    "companyName",
+    "companyEmail",
+    "startDate",
+    "endDate",
+    "allowance",
+    "submittedAt",
+    "comSupervisorName",
+    "comSupervisorEmail",
+]
+
+
+formula_prefixes = ("=", "+", "-", "@", "\t", "\r")
+
+
+def is_formula_like(value):
+    # Names and emails are entered by students and companies and must never be
+    # evaluated as formulas when an admin opens the export
+    return isinstance(value, str) and value.startswith(formula_prefixes)
+
+
+def csv_cell(value):
+    # CSV has no cell types; a leading quote makes spreadsheets read it as text
+    return "'" + value if is_formula_like(value) else value
+
+
+def xlsx_cell(sheet, value):
+    if not is_formula_like(value):
+        return value
+
+    # openpyxl would store "=..." as a formula; force a plain string cell
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.data_type = "s"
+    return cell
+
+
+def report_row(internship):
+    student = internship.student
+    return [
+        student.studentId,
+        student.fullName,
+        student.email,
+        student.icNumber,
+        student.supervisor.fullName,
+        student.supervisor.email,
+        internship.id,
+        internship.status,
+        internship.company.companyName,
+        internship.company.email,
+        internship.startDate.date().isoformat(),
+        internship.endDate.date().isoformat(),
+        internship.allowance,
+        internship.createdAt.isoformat(),
+        internship.comSupervisorName,
+        internship.comSupervisorEmail,
+    ]
+
+
+def stream_csv(internships):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # The header goes out before the first query runs
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for internship in internships:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([csv_cell(value) for value in report_row(internship)])
+        yield buffer.getvalue()
+
+
+def stream_xlsx(internships):
+    # An XLSX file is a zip archive that can only be finished once every row is
+    # known. The write-only workbook keeps memory flat while it is built; the
+    # file is then streamed from disk.
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Students")
+    sheet.append(columns)
+    for internship in internships:
+        sheet.append([xlsx_cell(sheet, value) for value in report_row(internship)])
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(storage_chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from prisma.models import Student
+
+from config import import_batch_size, import_max_errors
+from principal_cache import principal_cache
+
+student_fields = ("studentId", "fullName", "email", "icNumber")
+unique_fields = ("studentId", "email", "icNumber")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(stream, format):
+    # Rows are parsed straight off the request stream, one line at a time
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            for row in csv.DictReader(text):
+                yield row
+        else:
+            for line in text:
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        row = None
+                    yield row if isinstance(row, dict) else None
+    except UnicodeDecodeError:
+        raise ImportFormatError("File is not valid UTF-8")
+    except csv.Error as e:
+        raise ImportFormatError("Malformed CSV: " + str(e))
+
+
+def validate_row(row):
+    if row is None:
+        return None, "Malformed row"
+
+    student = {}
+    for field in student_fields:
+        value = row.get(field)
+        if not isinstance(value, str) or value.strip() == "":
+            return None, "Missing " + field
+        student[field] = value.strip()
+
+    if "@" not in student["email"]:
+        return None, "Invalid email"
+    return student, None
+
+
+class StudentImport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+        self._seen = {field: set() for field in unique_fields}
+
+    def error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < import_max_errors:
+            self.errors.append({"row": row_number, "message": message})
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, import_batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self
+
+    def import_batch(self, batch):
+        valid = []
+        for row_number, row in batch:
+            self.rows += 1
+            student, message = validate_row(row)
+            if student is None:
+                self.error(row_number, message)
+                continue
+
+            duplicate = next(
+                (f for f in unique_fields if student[f] in self._seen[f]), None
+            )
+            if duplicate is not None:
+                self.error(row_number, "Duplicate " + duplicate + " in file")
+                continue
+
+            for field in unique_fields:
+                self._seen[field].add(student[field])
+            valid.append((row_number, student))
+
+        if not valid:
+            return
+
+        # One query finds every row that clashes with an existing student
+        existing = Student.prisma().find_many(
+            where={
+                "OR": [
+                    {field: {"in": [student[field] for _, student in valid]}}
+                    for field in unique_fields
+                ]
+            }
+        )
+        taken = {
+            field: {getattr(student, field) for student in existing}
+            for field in unique_fields
+        }
+
+        fresh = []
+        for row_number, student in valid:
+            clash = next((f for f in unique_fields if student[f] in taken[f]), None)
+            if clash is None:
+                fresh.append(student)
+            else:
+                self.error(row_number, "Student with this " + clash + " already exists")
+
+        if fresh:
+            self.created += Student.prisma().create_many(
+                data=fresh, skip_duplicates=True
+            )
+            principal_cache.invalidate("student", *[s["email"] for s in fresh])
+
+    def summary(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "skipped": self.rows - self.created,
+            "errors": self.errors,
+            "errorCount": self.error_count,
+            "errorsTruncated": self.error_count > len(self.errors),
+        }
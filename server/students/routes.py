@@ -1,12 +1,22 @@
 from flask import Blueprint, current_app, jsonify, make_response, request
 from flask_jwt_extended import create_access_token
 import jwt
-import boto3
 import prisma
-from prisma.models import Student
+from prisma.models import Internship, Student
+from prisma.partials import StudentProgressReport
 from config import *
 
+import approved_companies
 from auth_middleware import supervisor_token_required, student_token_required
+from events import event_stream_response, publish_internship_status
+from fields import parse_fields, prune, prune_include
+from pagination import PaginationError, equals, paginate
+from presigned_url_cache import presigned_url_cache
+from principal_cache import principal_cache
+from progress_reports import record_progress_report
+import serializers
+from storage import get_storage, progress_report_key
+from token_claims import principal_claims
 
 students = Blueprint("students", __name__)
 
@@ -37,6 +47,7 @@ def studentSignUp():
         )
 
         print(student)
+        principal_cache.invalidate("student", email)
 
         return jsonify(
             {
@@ -75,47 +86,19 @@ def studentLogin():
         if student.icNumber != icNumber:
             return jsonify({"message": "Invalid IC Number", "success": False})
 
-        supervisor = None
-        if student.supervisor is not None:
-            supervisor = {
-                "fullName": student.supervisor.fullName,
-                "email": student.supervisor.email,
-            }
-
-        internship = None
-        if student.internship is not None:
-            internship = {
-                "id": student.internship.id,
-                "status": student.internship.status,
-                "company": {
-                    "companyName": student.internship.company.companyName,
-                    "email": student.internship.company.email,
-                },
-                "startDate": student.internship.startDate.isoformat(),
-                "endDate": student.internship.endDate.isoformat(),
-                "allowance": student.internship.allowance,
-                "createdAt": student.internship.createdAt.isoformat(),
-                "comSupervisorName": student.internship.comSupervisorName,
-                "comSupervisorEmail": student.internship.comSupervisorEmail,
-            }
-
         # Create access token
-        access_token = create_access_token(identity=student.email, expires_delta=False)
+        access_token = create_access_token(
+            identity=student.email,
+            expires_delta=False,
+            additional_claims=principal_claims("student", student),
+        )
         response = make_response(
             jsonify(
                 {
                     "access_token": access_token,
                     "success": True,
                     "message": "Student logged in successfully",
-                    "data": {
-                        "studentId": student.studentId,
-                        "fullName": student.fullName,
-                        "email": student.email,
-                        "icNumber": student.icNumber,
-                        "supervisor": supervisor,
-                        "createdAt": student.createdAt.isoformat(),
-                        "internship": internship,
-                    },
+                    "data": serializers.student(student),
                 }
             ),
             200,
@@ -147,9 +130,13 @@ def studentMe():
         decoded = jwt.decode(
             token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
         )
+        fields = parse_fields()
         user = Student.prisma().find_unique(
             where={"email": decoded["sub"]},
-            include={"internship": {"include": {"company": True}}, "supervisor": True},
+            include=prune_include(
+                {"internship": {"include": {"company": True}}, "supervisor": True},
+                fields,
+            ),
         )
         if user is None:
             return {
@@ -158,43 +145,11 @@ def studentMe():
                 "success": False,
             }, 401
 
-        supervisor = None
-        if user.supervisor is not None:
-            supervisor = {
-                "email": user.supervisor.email,
-                "fullName": user.supervisor.fullName,
-            }
-
-        internship = None
-        if user.internship is not None:
-            internship = {
-                "id": user.internship.id,
-                "status": user.internship.status,
-                "company": {
-                    "companyName": user.internship.company.companyName,
-                    "email": user.internship.company.email,
-                },
-                "startDate": user.internship.startDate.isoformat(),
-                "endDate": user.internship.endDate.isoformat(),
-                "allowance": user.internship.allowance,
-                "createdAt": user.internship.createdAt.isoformat(),
-                "comSupervisorName": user.internship.comSupervisorName,
-                "comSupervisorEmail": user.internship.comSupervisorEmail,
-            }
-
         return jsonify(
             {
                 "message": "Authorized student",
                 "success": True,
-                "data": {
-                    "studentId": user.studentId,
-                    "fullName": user.fullName,
-                    "email": user.email,
-                    "icNumber": user.icNumber,
-                    "supervisor": supervisor,
-                    "createdAt": user.createdAt.isoformat(),
-                    "internship": internship,
-                },
+                "data": prune(serializers.student(user), fields),
             }
         )
     except Exception as e:
@@ -231,23 +186,29 @@ def studentLogout():
 @supervisor_token_required
 def getStudents(user):
     try:
-        students = Student.prisma().find_many(order={"createdAt": "desc"})
+        students, next_cursor = paginate(
+            Student.prisma(),
+            ["createdAt", "fullName", "studentId"],
+            "studentId",
+            filters={
+                "supervisorEmail": equals("supervisorEmail"),
+                "unassigned": lambda value: (
+                    {"supervisorEmail": None} if value == "true" else {}
+                ),
+            },
+        )
         return jsonify(
             {
                 "message": "Students fetched successfully",
                 "success": True,
-                "data": [
-                    {
-                        "studentId": student.studentId,
-                        "fullName": student.fullName,
-                        "email": student.email,
-                        "icNumber": student.icNumber,
-                        "createdAt": student.createdAt.isoformat(),
-                    }
-                    for student in students
-                ],
+                "data": prune(
+                    list(map(serializers.student_summary, students)), parse_fields()
+                ),
+                "nextCursor": next_cursor,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -278,49 +239,31 @@ def submitInternship(user):
         ):
             return {"message": "Missing required fields", "success": False}
 
-        student = Student.prisma().find_unique(
-            where={"email": user.email},
-            include={"internship": {"include": {"company": True}}, "supervisor": True},
+        if not approved_companies.is_approved(companyEmail):
+            return {"message": "Company not found", "success": False}
+
+        fields = {
+            "startDate": startDate,
+            "endDate": endDate,
+            "allowance": allowance,
+            "company": {"connect": {"email": companyEmail}},
+            "comSupervisorName": comSupervisorName,
+            "comSupervisorEmail": comSupervisorEmail,
+        }
+
+        # Create the internship or resubmit the existing one in a single query
+        internship = Internship.prisma().upsert(
+            where={"studentId": user.studentId},
+            data={
+                "create": {
+                    **fields,
+                    "student": {"connect": {"studentId": user.studentId}},
+                },
+                "update": {**fields, "status": "SUBMITTED"},
+            },
         )
 
-        if student is None:
-            return {"message": "Student not found", "success": False}
-
-        # If student has not yet submitted internship
-        if student.internship is None:
-            student = Student.prisma().update(
-                where={"email": user.email},
-                data={
-                    "internship": {
-                        "create": {
-                            "startDate": startDate,
-                            "endDate": endDate,
-                            "allowance": allowance,
-                            "company": {"connect": {"email": companyEmail}},
-                            "comSupervisorName": comSupervisorName,
-                            "comSupervisorEmail": comSupervisorEmail,
-                        }
-                    },
-                },
-            )
-        else:
-            # Else, update the existing internship
-            student = Student.prisma().update(
-                where={"email": user.email},
-                data={
-                    "internship": {
-                        "update": {
-                            "startDate": startDate,
-                            "endDate": endDate,
-                            "allowance": allowance,
-                            "company": {"connect": {"email": companyEmail}},
-                            "comSupervisorName": comSupervisorName,
-                            "comSupervisorEmail": comSupervisorEmail,
-                            "status": "SUBMITTED",
-                        }
-                    },
-                },
-            )
+        publish_internship_status(internship, user)
 
         return jsonify(
             {
@@ -342,52 +285,21 @@ def uploadProgressReport(user):
         if progress_report_file is None or progress_report_file.filename == "":
             return {"message": "Please select a file", "success": False}
 
-        student = Student.prisma().find_unique(
-            where={"email": user.email},
-            include={"internship": {"include": {"company": True}}, "supervisor": True},
-        )
-
-        if student is None:
-            return {"message": "Student not found", "success": False}
-
         # Get file extension
         file_extension = progress_report_file.filename.split(".")[-1]
+        key = progress_report_key(user.studentId, file_extension)
 
-        progress_report_file_name_in_s3 = (
-            "progress-report-" + student.studentId + "." + file_extension
-        )
+        # Upload file to storage
+        storage = get_storage()
+        storage.put(key, progress_report_file, progress_report_file.mimetype)
 
-        # Upload file to S3
-        s3 = boto3.resource("s3")
-        s3.Bucket(custom_bucket).put_object(
-            Key="progress-reports/" + progress_report_file_name_in_s3,
-            Body=progress_report_file,
-        )
-        bucket_location = boto3.client("s3").get_bucket_location(Bucket=custom_bucket)
-        s3_location = bucket_location["LocationConstraint"]
-        if s3_location is None:
-            s3_location = ""
-        else:
-            s3_location = "-" + s3_location
-
-        object_url = "https://s3{0}.amazonaws.com/{1}/{2}".format(
-            s3_location, custom_bucket, progress_report_file_name_in_s3
-        )
+        # Record the report metadata so reads never have to probe storage
+        report = record_progress_report(user.studentId, storage.head(key))
+        presigned_url_cache.invalidate(key)
 
         # Generate presigned URL
-        presigned_url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": custom_bucket,
-                "Key": "progress-reports/" + progress_report_file_name_in_s3,
-            },
-            ExpiresIn=3600,
-        )
-
-        # Get uploadedAt
-        uploadedAt = s3.Bucket(custom_bucket).Object(
-            "progress-reports/progress-report-" + student.studentId + ".pdf"
-        ).last_modified
+        presigned_url = presigned_url_cache.get_url(report.key, report.etag)
+        uploadedAt = report.uploadedAt
 
         return jsonify(
             {
@@ -408,9 +320,9 @@ def uploadProgressReport(user):
 @student_token_required
 def getProgressReport(user):
     try:
-        student = Student.prisma().find_unique(
+        student = StudentProgressReport.prisma().find_unique(
             where={"email": user.email},
-            include={"internship": {"include": {"company": True}}, "supervisor": True},
+            include={"internship": True, "progressReport": True},
         )
 
         if student is None:
@@ -419,18 +331,9 @@ def getProgressReport(user):
         if student.internship is None:
             return {"message": "Student has not submitted internship", "success": False}
 
-        # Check S3 if file exists using head_object
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(custom_bucket)
-        file_exists = True
-        try:
-            bucket.Object(
-                "progress-reports/progress-report-" + student.studentId + ".pdf"
-            ).load()
-        except:
-            file_exists = False
-
-        if not file_exists:
+        report = student.progressReport
+
+        if report is None:
             return jsonify(
                 {
                     "message": "Progress report not found",
@@ -443,19 +346,8 @@ def getProgressReport(user):
             )
 
         # Generate presigned URL
-        presigned_url = s3.meta.client.generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": custom_bucket,
-                "Key": "progress-reports/progress-report-" + student.studentId + ".pdf",
-            },
-            ExpiresIn=3600,
-        )
-
-        # Get uploadedAt
-        uploadedAt = bucket.Object(
-            "progress-reports/progress-report-" + student.studentId + ".pdf"
-        ).last_modified
+        presigned_url = presigned_url_cache.get_url(report.key, report.etag)
+        uploadedAt = report.uploadedAt
 
         return jsonify(
             {
@@ -469,3 +361,109 @@ def getProgressReport(user):
         )
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
+
+
+@students.route("/progress-report/upload-url", methods=["POST"])
+@student_token_required
+def createProgressReportUpload(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        fileName = data.get("fileName")
+
+        if fileName is None or fileName == "":
+            return {"message": "Missing required fields", "success": False}
+
+        file_extension = fileName.split(".")[-1].lower()
+        content_type = progress_report_content_types.get(file_extension)
+
+        if content_type is None:
+            return {"message": "Unsupported file type", "success": False}
+
+        # The client uploads straight to storage with this policy, so the file
+        # never passes through a Flask worker
+        key = progress_report_key(user.studentId, file_extension)
+        upload = get_storage().presign_post(
+            key,
+            content_type,
+            progress_report_max_size,
+            progress_report_upload_expires_in,
+        )
+
+        return jsonify(
+            {
+                "message": "Upload URL created successfully",
+                "success": True,
+                "data": {
+                    "key": key,
+                    "url": upload["url"],
+                    "fields": upload["fields"],
+                    "maxSize": progress_report_max_size,
+                    "expiresIn": progress_report_upload_expires_in,
+                },
+            }
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@students.route("/progress-report/complete", methods=["POST"])
+@student_token_required
+def completeProgressReportUpload(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        key = data.get("key")
+
+        if key is None:
+            return {"message": "Missing required fields", "success": False}
+
+        file_extension = key.split(".")[-1]
+        if (
+            file_extension not in progress_report_content_types
+            or key != progress_report_key(user.studentId, file_extension)
+        ):
+            return {"message": "Invalid progress report key", "success": False}
+
+        # Verify the object actually landed in storage before recording it
+        storage = get_storage()
+        uploaded = storage.head(key)
+
+        if uploaded is None:
+            return {"message": "Progress report not uploaded", "success": False}
+
+        if uploaded["size"] > progress_report_max_size:
+            return {"message": "Progress report is too large", "success": False}
+
+        report = record_progress_report(user.studentId, uploaded)
+        presigned_url_cache.invalidate(key)
+
+        return jsonify(
+            {
+                "message": "Progress report uploaded successfully",
+                "success": True,
+                "data": {
+                    "downloadUrl": presigned_url_cache.get_url(
+                        report.key, report.etag
+                    ),
+                    "uploadedAt": report.uploadedAt,
+                },
+            }
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@students.route("/events", methods=["GET"])
+@student_token_required
+def studentEvents(user):
+    try:
+        return event_stream_response("student", user.email)
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
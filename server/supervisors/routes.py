@@ -1,12 +1,23 @@
-from flask import Blueprint, current_app, jsonify, make_response, request
+from flask import Blueprint, Response, current_app, jsonify, make_response, request
 from flask_jwt_extended import create_access_token, unset_jwt_cookies
 import jwt
 import prisma
-import boto3
+from prisma import get_client
 from config import *
 from prisma.models import Supervisor, Student
+from prisma.partials import ProgressReportRef, RosterStudent
 
 from auth_middleware import admin_token_required, supervisor_token_required
+from bulk import BulkRequestError, parse_bulk_list
+from events import event_stream_response
+from fields import parse_fields, prune, prune_include, wants
+from pagination import PaginationError, boolean, paginate
+from presigned_url_cache import presigned_url_cache
+from principal_cache import principal_cache
+import serializers
+from storage import get_storage
+from token_claims import bump_version, principal_claims
+from zip_stream import stream_zip
 
 supervisors = Blueprint("supervisors", __name__)
 
@@ -33,6 +44,7 @@ def supervisorSignUp():
                 "password": password,
             }
         )
+        principal_cache.invalidate("supervisor", email)
 
         return jsonify(
             {
@@ -69,7 +81,10 @@ def supervisorLogin():
             return jsonify({"message": "Wrong password", "success": False})
 
         # Create access token
-        access_token = create_access_token(identity=supervisor.email)
+        access_token = create_access_token(
+            identity=supervisor.email,
+            additional_claims=principal_claims("supervisor", supervisor),
+        )
         response = make_response(
             jsonify(
                 {
@@ -124,11 +139,14 @@ def supervisorMe():
             {
                 "message": "Authorized supervisor",
                 "success": True,
-                "data": {
-                    "email": user.email,
-                    "fullName": user.fullName,
-                    "isApproved": user.isApproved,
-                },
+                "data": prune(
+                    {
+                        "email": user.email,
+                        "fullName": user.fullName,
+                        "isApproved": user.isApproved,
+                    },
+                    parse_fields(),
+                ),
             }
         )
     except Exception as e:
@@ -165,22 +183,24 @@ def supervisorLogout():
 @admin_token_required
 def getSupervisors(user):
     try:
-        supervisors = Supervisor.prisma().find_many(order={"createdAt": "desc"})
+        supervisors, next_cursor = paginate(
+            Supervisor.prisma(),
+            ["createdAt", "fullName", "email"],
+            "email",
+            filters={"isApproved": boolean("isApproved")},
+        )
         return jsonify(
             {
                 "message": "Supervisors fetched successfully",
-                "data": [
-                    {
-                        "email": supervisor.email,
-                        "fullName": supervisor.fullName,
-                        "isApproved": supervisor.isApproved,
-                        "createdAt": supervisor.createdAt.isoformat(),
-                    }
-                    for supervisor in supervisors
-                ],
+                "data": prune(
+                    list(map(serializers.supervisor, supervisors)), parse_fields()
+                ),
+                "nextCursor": next_cursor,
                 "success": True,
             }
         )
+    except PaginationError as e:
+        return jsonify({"message": str(e), "success": False}), 400
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
 
@@ -205,6 +225,8 @@ def approveSupervisor(user):
                 "isApproved": True,
             },
         )
+        principal_cache.invalidate("supervisor", email)
+        bump_version("supervisor", email)
 
         return jsonify(
             {
@@ -216,6 +238,50 @@ def approveSupervisor(user):
         return jsonify({"message": str(e), "success": False}), 500
 
 
+@supervisors.route("/approve-bulk", methods=["POST"])
+@admin_token_required
+def approveSupervisors(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        emails = parse_bulk_list(data, "emails")
+
+        with get_client().tx() as tx:
+            supervisors = Supervisor.prisma(tx).find_many(
+                where={"email": {"in": emails}}
+            )
+            Supervisor.prisma(tx).update_many(
+                where={"email": {"in": emails}, "isApproved": False},
+                data={"isApproved": True},
+            )
+
+        known = {supervisor.email: supervisor.isApproved for supervisor in supervisors}
+        approved = [email for email in emails if known.get(email) is False]
+        principal_cache.invalidate("supervisor", *approved)
+        bump_version("supervisor", *approved)
+
+        return jsonify(
+            {
+                "message": "Supervisors approved successfully",
+                "data": {
+                    "approved": approved,
+                    "alreadyApproved": [
+                        email for email in emails if known.get(email) is True
+                    ],
+                    "unknown": [email for email in emails if email not in known],
+                },
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
 @supervisors.route("/assign-student", methods=["POST"])
 @supervisor_token_required
 def assignStudent(user):
@@ -245,6 +311,8 @@ def assignStudent(user):
             where={"studentId": studentId},
             data={"supervisor": {"connect": {"email": user.email}}},
         )
+        principal_cache.invalidate("student", student.email)
+        bump_version("student", student.email)
 
         return jsonify(
             {
@@ -262,82 +330,154 @@ def assignStudent(user):
         return jsonify({"message": str(e), "success": False}), 500
 
 
+@supervisors.route("/assign-students", methods=["POST"])
+@supervisor_token_required
+def assignStudents(user):
+    try:
+        data = request.json
+
+        if data is None:
+            return
+
+        studentIds = parse_bulk_list(data, "studentIds")
+
+        with get_client().tx() as tx:
+            before = Student.prisma(tx).find_many(
+                where={"studentId": {"in": studentIds}}
+            )
+            unassigned = [s.studentId for s in before if s.supervisorEmail is None]
+
+            # The supervisorEmail = null condition makes the claim atomic: a
+            # student taken by someone else in the meantime is simply not updated
+            claimedCount = 0
+            if unassigned:
+                claimedCount = Student.prisma(tx).update_many(
+                    where={"studentId": {"in": unassigned}, "supervisorEmail": None},
+                    data={"supervisorEmail": user.email},
+                )
+
+            # Only re-read when some of the claims lost a race
+            claimed = [s for s in before if s.supervisorEmail is None]
+            if claimedCount != len(unassigned):
+                claimed = [
+                    s
+                    for s in Student.prisma(tx).find_many(
+                        where={"studentId": {"in": unassigned}}
+                    )
+                    if s.supervisorEmail == user.email
+                ]
+
+        owners = {s.studentId: s.supervisorEmail for s in before}
+        claimedIds = {s.studentId for s in claimed}
+
+        principal_cache.invalidate("student", *[s.email for s in claimed])
+        bump_version("student", *[s.email for s in claimed])
+
+        return jsonify(
+            {
+                "message": "Students assigned successfully",
+                "data": {
+                    "claimed": [id for id in studentIds if id in claimedIds],
+                    "alreadyAssigned": [
+                        id
+                        for id in studentIds
+                        if id not in claimedIds and owners.get(id) == user.email
+                    ],
+                    "taken": [
+                        id
+                        for id in studentIds
+                        if id in owners
+                        and id not in claimedIds
+                        and owners[id] != user.email
+                    ],
+                    "unknown": [id for id in studentIds if id not in owners],
+                },
+                "success": True,
+            }
+        )
+    except BulkRequestError as e:
+        return jsonify({"message": str(e), "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
 @supervisors.route("/my-students", methods=["GET"])
 @supervisor_token_required
 def getMyStudents(user):
     try:
-        students = Student.prisma().find_many(
-            where={"supervisorEmail": user.email},
-            include={"supervisor": True, "internship": {"include": {"company": True}}},
+        fields = parse_fields()
+        include = prune_include(
+            {"supervisor": True, "internship": {"include": {"company": True}}},
+            fields,
+        )
+        if wants(fields, "downloadUrl"):
+            include["progressReport"] = True
+
+        students = RosterStudent.prisma().find_many(
+            where={"supervisorEmail": user.email}, include=include
         )
 
         # Initialize an empty list to store student data
         student_data = []
 
-        # Check S3 if file exists using head_object and generate presigned URL
-        s3 = boto3.client("s3")
+        # Report metadata comes with the students, storage is only used to sign URLs
         for student in students:
-            file_exists = True
-            try:
-                s3.head_object(
-                    Bucket=custom_bucket,
-                    Key=f"progress-reports/progress-report-{student.studentId}.pdf",
-                )
-            except:
-                file_exists = False
-
-            if not file_exists:
+            if student.progressReport is None:
                 downloadUrl = None
             else:
-                # Generate presigned URL
-                presigned_url = s3.generate_presigned_url(
-                    "get_object",
-                    Params={
-                        "Bucket": custom_bucket,
-                        "Key": f"progress-reports/progress-report-{student.studentId}.pdf",
-                    },
-                    ExpiresIn=3600,
+                downloadUrl = presigned_url_cache.get_url(
+                    student.progressReport.key, student.progressReport.etag
                 )
-                downloadUrl = presigned_url
-
-            internship = None
-            if student.internship is not None:
-                internship = {
-                    "id": student.internship.id,
-                    "status": student.internship.status,
-                    "company": {
-                        "companyName": student.internship.company.companyName,
-                        "email": student.internship.company.email,
-                    },
-                    "startDate": student.internship.startDate.isoformat(),
-                    "endDate": student.internship.endDate.isoformat(),
-                    "allowance": student.internship.allowance,
-                    "createdAt": student.internship.createdAt.isoformat(),
-                    "comSupervisorName": student.internship.comSupervisorName,
-                    "comSupervisorEmail": student.internship.comSupervisorEmail,
-                }
 
-            student_data.append(
-                {
-                    "studentId": student.studentId,
-                    "email": student.email,
-                    "fullName": student.fullName,
-                    "icNumber": student.icNumber,
-                    "supervisor": {
-                        "email": student.supervisor.email,
-                        "fullName": student.supervisor.fullName,
-                    },
-                    "internship": internship,
-                    "downloadUrl": downloadUrl,
-                }
-            )
+            student_data.append(serializers.roster_student(student, downloadUrl))
 
         return jsonify(
             {
                 "message": "Students fetched successfully",
-                "data": student_data,
+                "data": prune(student_data, fields),
                 "success": True,
             }
         )
     except Exception as e:
         return jsonify({"message": str(e), "success": False}), 500
+
+
+@supervisors.route("/my-students/progress-reports.zip", methods=["GET"])
+@supervisor_token_required
+def downloadMyStudentsProgressReports(user):
+    try:
+        reports = ProgressReportRef.prisma().find_many(
+            where={"student": {"is": {"supervisorEmail": user.email}}},
+            order={"studentId": "asc"},
+        )
+
+        storage = get_storage()
+        entries = (
+            (
+                report.key.split("/")[-1],
+                report.uploadedAt,
+                storage.iter_chunks(report.key),
+            )
+            for report in reports
+        )
+
+        # Objects are read lazily, so a client disconnect stops the download
+        # from storage as well
+        return Response(
+            stream_zip(entries),
+            mimetype="application/zip",
+            headers={
+                "Content-Disposition": "attachment; filename=progress-reports.zip"
+            },
+        )
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
+
+
+@supervisors.route("/events", methods=["GET"])
+@supervisor_token_required
+def supervisorEvents(user):
+    try:
+        return event_stream_response("supervisor", user.email)
+    except Exception as e:
+        return jsonify({"message": str(e), "success": False}), 500
@@ -0,0 +1,45 @@
+import io
+import zipfile
+from datetime import datetime, timezone
+
+from storage import MemoryStorage
+from zip_stream import stream_zip
+
+modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def read_archive(entries):
+    return zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(entries))))
+
+
+def test_missing_object_is_skipped_and_reported():
+    storage = MemoryStorage()
+    storage.put("progress-reports/a.pdf", b"a" * 100000)
+    storage.put("progress-reports/c.pdf", b"c" * 10)
+
+    archive = read_archive(
+        (key.split("/")[-1], modified, storage.iter_chunks(key))
+        for key in (
+            "progress-reports/a.pdf",
+            "progress-reports/b.pdf",
+            "progress-reports/c.pdf",
+        )
+    )
+
+    assert archive.testzip() is None
+    assert archive.namelist() == ["a.pdf", "c.pdf", "ERRORS.txt"]
+    assert archive.read("a.pdf") == b"a" * 100000
+    assert archive.read("c.pdf") == b"c" * 10
+    assert archive.read("ERRORS.txt").decode().startswith("b.pdf: not included")
+
+
+def test_read_error_midway_keeps_the_archive_valid():
+    def failing():
+        yield b"partial"
+        raise ConnectionError("connection reset")
+
+    archive = read_archive([("broken.pdf", modified, failing())])
+
+    assert archive.testzip() is None
+    assert archive.read("broken.pdf") == b"partial"
+    assert "broken.pdf: incomplete" in archive.read("ERRORS.txt").decode()
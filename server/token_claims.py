@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+from prisma import get_client
+from prisma.models import TokenVersion
+
+from config import (
+    cache_version_check_interval,
+    jwt_stateless_claims,
+    principal_cache_max_size,
+)
+
+# Token versions live in the TokenVersion table. Bumping a principal's version
+# makes the claims in its existing tokens stale, so the decorators fall back to
+# a DB lookup. Each node caches the version of every subject it has seen and
+# re-reads that one row at most once per cache_version_check_interval; its own
+# bumps are applied at once.
+_token_versions = OrderedDict()
+_lock = threading.Lock()
+
+
+class ClaimsPrincipal:
+    def __init__(self, email, **claims):
+        self.email = email
+        for name, value in claims.items():
+            setattr(self, name, value)
+
+
+def _remember(key, version):
+    with _lock:
+        expires = time.monotonic() + cache_version_check_interval
+        _token_versions[key] = (version, expires)
+        _token_versions.move_to_end(key)
+        while len(_token_versions) > principal_cache_max_size:
+            _token_versions.popitem(last=False)
+
+
+def current_version(role, email):
+    key = (role, email)
+    with _lock:
+        entry = _token_versions.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            _token_versions.move_to_end(key)
+            return entry[0]
+
+    record = TokenVersion.prisma().find_unique(
+        where={"role_email": {"role": role, "email": email}}
+    )
+    version = 0 if record is None else record.version
+    _remember(key, version)
+    return version
+
+
+def bump_version(role, *emails):
+    if not jwt_stateless_claims or not emails:
+        return
+
+    with get_client().tx() as tx:
+        records = [
+            TokenVersion.prisma(tx).upsert(
+                where={"role_email": {"role": role, "email": email}},
+                data={
+                    "create": {"role": role, "email": email, "version": 1},
+                    "update": {"version": {"increment": 1}},
+                },
+            )
+            for email in emails
+        ]
+    for record in records:
+        _remember((role, record.email), record.version)
+
+
+def principal_claims(role, user):
+    if not jwt_stateless_claims:
+        return {}
+
+    claims = {"role": role, "ver": current_version(role, user.email)}
+    if role == "supervisor" or role == "company":
+        claims["isApproved"] = user.isApproved
+    elif role == "student":
+        claims["studentId"] = user.studentId
+        claims["supervisorEmail"] = user.supervisorEmail
+    return claims
+
+
+def principal_from_claims(role, decoded):
+    if not jwt_stateless_claims:
+        return None
+
+    if decoded.get("role") != role:
+        return None
+    if decoded.get("ver") != current_version(role, decoded["sub"]):
+        return None
+
+    claims = {
+        name: value
+        for name, value in decoded.items()
+        if name in ("isApproved", "studentId", "supervisorEmail")
+    }
+    return ClaimsPrincipal(decoded["sub"], **claims)
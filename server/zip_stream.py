@@ -0,0 +1,60 @@
+import io
+import itertools
+import zipfile
+
+
+class _ZipStream(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries):
+    # entries yields (name, modified datetime, iterable of byte chunks). Each
+    # chunk is handed to the response as soon as it is compressed, so memory
+    # use does not depend on the number or size of the files.
+    #
+    # The status line is long gone by the time an object is read, so a read
+    # error cannot fail the response. An object that cannot be opened is left
+    # out and one that fails midway is cut short; both are listed in
+    # ERRORS.txt, and the archive itself stays valid.
+    stream = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(
+        stream, "w", zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as archive:
+        for name, modified, chunks in entries:
+            chunks = iter(chunks)
+            try:
+                first = next(chunks, b"")
+            except Exception as e:
+                errors.append("{0}: not included ({1!r})".format(name, e))
+                continue
+
+            info = zipfile.ZipInfo(name, modified.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=True) as entry:
+                try:
+                    for chunk in itertools.chain((first,), chunks):
+                        entry.write(chunk)
+                        data = stream.drain()
+                        if data:
+                            yield data
+                except Exception as e:
+                    errors.append("{0}: incomplete ({1!r})".format(name, e))
+            yield stream.drain()
+
+        if errors:
+            archive.writestr("ERRORS.txt", "\n".join(errors) + "\n")
+    yield stream.drain()